@@ -8,6 +8,12 @@ from . import include
 from . import input
 from . import watchdog
 from . import borderless
+from . import reco_cache
+from . import ocr_batch
+from . import screen
+from . import sandbox
+from . import color_stats
+from . import template_match
 
 # Import global variables and configuration from include
 from .include import (
@@ -35,6 +41,12 @@ from .watchdog import get_global_watchdog
 # Import borderless functions
 from .borderless import get_global_optimizer
 
+# Import recognition cache functions
+from .reco_cache import get_global_reco_cache, cached_run_recognition
+
+# Import frame color statistics functions
+from .color_stats import get_frame_color_stats
+
 # Define what gets exported when using "from action import *"
 __all__ = [
     # Submodules
@@ -43,6 +55,12 @@ __all__ = [
     'input',
     'watchdog',
     'borderless',
+    'reco_cache',
+    'ocr_batch',
+    'screen',
+    'sandbox',
+    'color_stats',
+    'template_match',
     
     # Logging functions
     'MaaLog_Debug',
@@ -60,6 +78,13 @@ __all__ = [
     # Borderless functions
     'get_global_optimizer',
     
+    # Recognition cache functions
+    'get_global_reco_cache',
+    'cached_run_recognition',
+    
+    # Frame color statistics functions
+    'get_frame_color_stats',
+    
     # Global variables
     'Task_Counter',
     'Enable_MaaLog_Debug',
@@ -0,0 +1,96 @@
+from .include import *
+import threading
+
+def color_mask(image, lower, upper):
+    """Pixels of a BGR image whose RGB lies within [lower, upper], like ColorMatch's default method"""
+    mask = np.ones(image.shape[:2], dtype=bool)
+    for channel, low, high in zip((2, 1, 0), lower, upper):
+        plane = image[:, :, channel]
+        mask &= (plane >= low) & (plane <= high)
+    return mask
+
+class FrameColorStats:
+    """
+    Pixel counts of color ranges inside rectangles of one frame.
+
+    A range is counted directly in each queried rectangle until the area
+    counted for it reaches a whole frame; then a summed-area table of that
+    range's mask is built once, and every later rectangle query for the same
+    range is four lookups. One-off checks never pay for a full-frame table.
+    """
+
+    def __init__(self, image):
+        self._image = image
+        self._height, self._width = image.shape[:2]
+        self._tables = {}
+        self._counted = {}
+        self._lock = threading.Lock()
+
+    def _table(self, key, area):
+        """Summed-area table of a range, once enough area has been counted for it to pay off"""
+        with self._lock:
+            table = self._tables.get(key)
+            if table is not None:
+                return table
+            self._counted[key] = self._counted.get(key, 0) + area
+            if self._counted[key] < self._height * self._width:
+                return None
+
+            mask = color_mask(self._image, *key)
+            table = np.zeros((self._height + 1, self._width + 1), dtype=np.int32)
+            np.cumsum(mask, axis=0, dtype=np.int32, out=table[1:, 1:])
+            np.cumsum(table[1:, 1:], axis=1, out=table[1:, 1:])
+            self._tables[key] = table
+            return table
+
+    def _clip(self, roi):
+        x, y, w, h = roi
+        left, top = min(max(x, 0), self._width), min(max(y, 0), self._height)
+        right, bottom = min(max(x + w, left), self._width), min(max(y + h, top), self._height)
+        return left, top, right, bottom
+
+    def mask(self, roi, lower, upper):
+        """Boolean mask of roi [x, y, w, h], clipped to the frame, whose RGB lies within [lower, upper]"""
+        left, top, right, bottom = self._clip(roi)
+        return color_mask(self._image[top:bottom, left:right], lower, upper)
+
+    def count(self, roi, lower, upper):
+        """Pixels of roi [x, y, w, h] whose RGB lies within [lower, upper]"""
+        left, top, right, bottom = self._clip(roi)
+        table = self._table((tuple(lower), tuple(upper)), (right - left) * (bottom - top))
+        if table is None:
+            return int(np.count_nonzero(self.mask(roi, lower, upper)))
+        return int(table[bottom, right] - table[top, right] - table[bottom, left] + table[top, left])
+
+    def ratio(self, roi, lower, upper):
+        """Fraction of roi within [lower, upper], e.g. 1.0 for a black screen with lower = upper = [0, 0, 0]"""
+        left, top, right, bottom = self._clip(roi)
+        area = (right - left) * (bottom - top)
+        return self.count(roi, lower, upper) / area if area else 0.0
+
+class FrameColorStatsCache:
+    """
+    Color statistics of the frame being recognized.
+
+    Recognitions receive their frame as a numpy array; statistics are reused
+    while the same array is passed again, so no frame is ever hashed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last_image = None
+        self._last_stats = None
+
+    def get(self, image):
+        with self._lock:
+            if self._last_image is not image:
+                self._last_image = image
+                self._last_stats = FrameColorStats(image)
+            return self._last_stats
+
+# Global frame color statistics cache instance
+_global_color_stats = FrameColorStatsCache()
+
+def get_frame_color_stats(image):
+    """Color statistics of a frame, shared by every query on the same image array"""
+    return _global_color_stats.get(image)
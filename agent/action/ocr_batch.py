@@ -0,0 +1,65 @@
+from .include import *
+from maa.custom_recognition import CustomRecognition
+
+from .log import MaaLog_Debug
+from .reco_cache import cached_run_recognition
+
+# OCR node without "expected", defined in pipeline/tasks/Custom/SharedRoiOCR.json
+SHARED_OCR_ENTRY = "SharedRoiOCR_Read"
+
+@AgentServer.custom_recognition("shared_roi_ocr")
+class SharedRoiOCRRecognition(CustomRecognition):
+    """
+    OCR recognition for candidates of one "next" list that read the same region.
+
+    The node's roi is read once per frame through the recognition cache, and
+    every candidate only matches its own "expected" against that result, so
+    N candidates on one roi cost one OCR pass instead of N.
+
+    custom_recognition_param:
+        expected:  regex or list of regexes, as OCR "expected" (required)
+        threshold: minimum score, defaults to the shared node's threshold
+        model:     OCR model folder, defaults to the shared node's model
+        only_rec:  recognize the whole roi as one line
+    Candidates sharing a read must use the same roi, threshold, model and only_rec.
+    """
+
+    def analyze(
+        self,
+        context: Context,
+        argv: CustomRecognition.AnalyzeArg,
+    ) -> CustomRecognition.AnalyzeResult:
+        param = argv.custom_recognition_param
+        if isinstance(param, str):
+            param = json.loads(param) if param else {}
+
+        expected = param.get("expected", [])
+        expected = [expected] if isinstance(expected, str) else expected
+        if not expected:
+            MaaLog_Debug(f"shared_roi_ocr: {argv.node_name} has no expected text")
+            return CustomRecognition.AnalyzeResult(box=None, detail="")
+
+        override = {"roi": [argv.roi.x, argv.roi.y, argv.roi.w, argv.roi.h]}
+        for field in ("threshold", "model", "only_rec"):
+            if field in param:
+                override[field] = param[field]
+
+        reco_detail = cached_run_recognition(
+            context, SHARED_OCR_ENTRY, argv.image, {SHARED_OCR_ENTRY: override}
+        )
+        if reco_detail is None:
+            return CustomRecognition.AnalyzeResult(box=None, detail="")
+
+        # Same rule as OCR "expected": a result matches if any regex is found in its text
+        matches = [
+            result for result in reco_detail.filterd_results
+            if any(re.search(pattern, result.text) for pattern in expected)
+        ]
+        if not matches:
+            return CustomRecognition.AnalyzeResult(box=None, detail="")
+
+        best = max(matches, key=lambda result: result.score)
+        return CustomRecognition.AnalyzeResult(
+            box=best.box,
+            detail=json.dumps({"text": best.text, "score": best.score}, ensure_ascii=False),
+        )
@@ -0,0 +1,124 @@
+from .include import *
+import threading
+import hashlib
+import weakref
+from collections import OrderedDict
+
+from .log import MaaLog_Debug
+
+def frame_digest(image):
+    """Digest of a frame's pixels and shape"""
+    digest = hashlib.blake2b(np.ascontiguousarray(image).data, digest_size=16)
+    digest.update(str(image.shape).encode())
+    return digest.hexdigest()
+
+class RecognitionCache:
+    """
+    Cache of Context.run_recognition results for the frame being recognized.
+
+    Entries are keyed by (node, pipeline_override) and belong to one frame of
+    one task on one loaded resource: a new frame digest, another task id or a
+    new resource hash drops them all, so the same recognition is only run once
+    per frame and never answered from an earlier frame, task or resource.
+
+    Overrides applied with context.override_pipeline() are not part of the
+    key: pass them as pipeline_override, or call clear() after changing them.
+    """
+
+    def __init__(self, max_entries=64):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._max_entries = max_entries
+        self._scope = None
+        self._last_image = None
+        self._last_digest = None
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _frame_digest(self, image):
+        """Digest of the frame pixels, reused while the same array is passed again"""
+        if self._last_image is not None and self._last_image() is image:
+            return self._last_digest
+
+        self._last_image = weakref.ref(image)
+        self._last_digest = frame_digest(image)
+        return self._last_digest
+
+    @staticmethod
+    def _task_scope(context):
+        """(task id, resource hash) a result belongs to"""
+        try:
+            task_id = context.get_task_job().job_id
+        except ValueError:
+            task_id = None
+        return task_id, context.tasker.resource.hash
+
+    def _enter(self, scope, image):
+        """Drop every entry once the task, the resource or the frame has changed"""
+        scope = (*scope, self._frame_digest(image))
+        if scope != self._scope:
+            self.evictions += len(self._entries)
+            self._entries.clear()
+            self._scope = scope
+
+    def run_recognition(self, context, entry, image, pipeline_override=None):
+        """Cached equivalent of context.run_recognition(entry, image, pipeline_override)"""
+        scope = self._task_scope(context)
+        key = (entry, json.dumps(pipeline_override or {}, ensure_ascii=False, sort_keys=True))
+        with self._lock:
+            self._enter(scope, image)
+            current = self._scope
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        # Recognize outside the lock; a concurrent miss on the same key only costs a duplicate run
+        detail = context.run_recognition(entry, image, pipeline_override or {})
+
+        with self._lock:
+            if self._scope != current:
+                # Another frame or task took over while recognizing; the result is not for it
+                return detail
+            self._entries[key] = detail
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return detail
+
+    def clear(self):
+        """Drop all entries, e.g. after context.override_pipeline()"""
+        MaaLog_Debug(f"RecognitionCache cleared ({self.stats()})")
+        with self._lock:
+            self._entries.clear()
+            self._scope = None
+            self._last_image = None
+            self._last_digest = None
+
+    def stats(self):
+        """Hit/miss counters"""
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "hit_rate": round(rate, 3),
+        }
+
+# Global recognition cache instance, holding the current frame of the current task
+_global_reco_cache = RecognitionCache()
+
+def get_global_reco_cache():
+    """Get global recognition cache instance"""
+    return _global_reco_cache
+
+def cached_run_recognition(context, entry, image, pipeline_override=None):
+    """context.run_recognition through the global recognition cache"""
+    return _global_reco_cache.run_recognition(context, entry, image, pipeline_override)
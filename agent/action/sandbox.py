@@ -0,0 +1,79 @@
+from .include import *
+
+from .log import MaaLog_Debug
+from .screen import capture_signature, wait_for_screen
+
+def target_point(target):
+    """Point of a [x, y, w, h] or [x, y] target, its center like a fixed LongPress target"""
+    if len(target) >= 4:
+        return target[0] + target[2] // 2, target[1] + target[3] // 2
+    return target[0], target[1]
+
+@AgentServer.custom_action("sandbox_runtimes")
+class SandboxRuntimesAction(CustomAction):
+    """
+    Sandbox deploy/click sequence in one action
+
+    Waits for the screen to settle instead of a fixed pre_delay, then
+    long-presses each step's target and waits for the screen to react and
+    settle instead of a fixed post_delay. Without steps, waits for the screen
+    to change and then settle, and for the whole settle_timeout if it never
+    changes, so a briefly static screen does not cut a deliberate delay short.
+
+    custom_action_param:
+        steps:              [{"target": [x, y, w, h], "duration": 200}, ...]
+        pre_settle_timeout: max ms to wait before the first step (default 0)
+        settle_timeout:     max ms to wait after each step (default 1000)
+        change_threshold:   frame difference that counts as a reaction (default 2.0)
+        stable_threshold:   frame difference that counts as settled (default 0.5)
+    """
+
+    def run(
+        self,
+        context: Context,
+        argv: CustomAction.RunArg,
+    ) -> bool:
+        try:
+            param = argv.custom_action_param
+            if isinstance(param, str):
+                param = json.loads(param) if param else {}
+
+            steps = param.get('steps', [])
+            pre_settle_timeout = param.get('pre_settle_timeout', 0)
+            settle_timeout = param.get('settle_timeout', 1000)
+            change_threshold = param.get('change_threshold', 2.0)
+            stable_threshold = param.get('stable_threshold', 0.5)
+
+            controller = context.tasker.controller
+
+            if pre_settle_timeout > 0:
+                _, waited = wait_for_screen(controller, None, pre_settle_timeout, change_threshold, stable_threshold)
+                MaaLog_Debug(f"sandbox_runtimes [{argv.node_name}]: settled before input after {waited:.0f} ms")
+
+            if not steps:
+                before = capture_signature(controller)
+                _, waited = wait_for_screen(controller, before, settle_timeout, change_threshold, stable_threshold)
+                MaaLog_Debug(f"sandbox_runtimes [{argv.node_name}]: settled after {waited:.0f} ms")
+                return CustomAction.RunResult(success=True)
+
+            for i, step in enumerate(steps):
+                if context.tasker.stopping:
+                    return CustomAction.RunResult(success=False)
+
+                x, y = target_point(step['target'])
+                before = capture_signature(controller)
+
+                controller.post_touch_down(x, y).wait()
+                time.sleep(step.get('duration', 200) / 1000)
+                controller.post_touch_up().wait()
+
+                _, waited = wait_for_screen(controller, before, settle_timeout, change_threshold, stable_threshold)
+                MaaLog_Debug(f"sandbox_runtimes [{argv.node_name}] step {i + 1}/{len(steps)}: "
+                             f"press ({x}, {y}), settled after {waited:.0f} ms")
+
+            return CustomAction.RunResult(success=True)
+
+        except Exception as e:
+            MaaLog_Debug(f"Exception occurred during sandbox_runtimes action execution: {e}")
+            traceback.print_exc()
+            return CustomAction.RunResult(success=False)
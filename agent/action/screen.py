@@ -0,0 +1,159 @@
+from .include import *
+from maa.custom_recognition import CustomRecognition
+
+from .log import MaaLog_Debug
+
+# Frames are compared as a grayscale thumbnail of at most this many blocks (width, height)
+SIGNATURE_SIZE = (32, 18)
+
+# Every 4th pixel in both directions is enough to average a block
+SAMPLE_STEP = 4
+
+# Default timeout of wait_screen_stable, the fixed delays it replaces were about this long
+ACTION_TIMEOUT_MS = 2000
+
+# Default timeout of screen_stable, which holds up the evaluation of a whole next list
+RECOGNITION_TIMEOUT_MS = 500
+
+def frame_signature(image, roi=None):
+    """Block-averaged grayscale thumbnail of a BGR frame or of roi [x, y, w, h] in it"""
+    if roi is not None:
+        x, y, w, h = roi
+        image = image[max(y, 0):y + h, max(x, 0):x + w]
+    if image.size == 0:
+        return None
+
+    if image.shape[0] >= SIGNATURE_SIZE[1] * SAMPLE_STEP and image.shape[1] >= SIGNATURE_SIZE[0] * SAMPLE_STEP:
+        image = image[::SAMPLE_STEP, ::SAMPLE_STEP]
+    gray = image.mean(axis=2, dtype=np.float32)
+    height, width = gray.shape
+    rows = np.linspace(0, height, min(SIGNATURE_SIZE[1], height) + 1).astype(int)[:-1]
+    cols = np.linspace(0, width, min(SIGNATURE_SIZE[0], width) + 1).astype(int)[:-1]
+    sums = np.add.reduceat(np.add.reduceat(gray, rows, axis=0), cols, axis=1)
+    sizes = np.outer(np.diff(np.append(rows, height)), np.diff(np.append(cols, width)))
+    return sums / sizes
+
+def frame_difference(a, b):
+    """Mean absolute difference of two frame signatures, 0-255"""
+    if a is None or b is None or a.shape != b.shape:
+        return 255.0
+    return float(np.abs(a - b).mean())
+
+def capture_signature(controller, roi=None):
+    image = controller.post_screencap().wait().get()
+    return frame_signature(image, roi) if image is not None else None
+
+def wait_for_screen(controller, before, timeout_ms, change_threshold=2.0, stable_threshold=0.5,
+                    roi=None, stable_frames=2, poll_ms=20, first=None):
+    """
+    Wait until the screen has reacted to an input and stopped moving.
+
+    The screen has reacted once a frame differs from before by more than
+    change_threshold, and is settled once stable_frames consecutive frames
+    differ by less than stable_threshold. Pass before=None to only wait for
+    the screen to settle, starting from the signature first if one was
+    already taken. Returns (settled, elapsed ms); gives up at timeout_ms and
+    does not start a screencap that would not finish before it.
+    """
+    start = time.perf_counter()
+    deadline = start + timeout_ms / 1000
+    capture_time = 0.0
+    changed = before is None
+    last = before if before is not None else first
+    unchanged = 1
+    while True:
+        captured = time.perf_counter()
+        if captured + capture_time > deadline:
+            return False, (captured - start) * 1000
+        current = capture_signature(controller, roi)
+        capture_time = max(capture_time, time.perf_counter() - captured)
+        if not changed:
+            changed = frame_difference(current, before) > change_threshold
+        elif frame_difference(current, last) < stable_threshold:
+            unchanged += 1
+            if unchanged >= stable_frames:
+                return True, (time.perf_counter() - start) * 1000
+        else:
+            unchanged = 1
+        last = current
+
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            return False, (time.perf_counter() - start) * 1000
+        time.sleep(min(poll_ms / 1000, remaining))
+
+def stability_param(param, timeout_ms=ACTION_TIMEOUT_MS):
+    """Parameters shared by wait_screen_stable and screen_stable"""
+    if isinstance(param, str):
+        param = json.loads(param) if param else {}
+    return {
+        'roi': param.get('roi'),
+        'stable_frames': param.get('frames', 3),
+        'timeout_ms': param.get('timeout', timeout_ms),
+        'stable_threshold': param.get('threshold', 0.5),
+        'poll_ms': param.get('interval', 20),
+    }
+
+@AgentServer.custom_action("wait_screen_stable")
+class WaitScreenStableAction(CustomAction):
+    """
+    Wait until the screen stops changing, in place of a fixed post_delay
+
+    custom_action_param:
+        roi:       [x, y, w, h] to watch (default: whole screen)
+        frames:    consecutive unchanged frames required (default 3)
+        timeout:   hard limit in ms, the old worst-case delay (default 2000)
+        threshold: grayscale difference below which frames count as unchanged (default 0.5)
+        interval:  ms between screencaps (default 20)
+    Succeeds on timeout too, like the delay it replaces.
+    """
+
+    def run(
+        self,
+        context: Context,
+        argv: CustomAction.RunArg,
+    ) -> bool:
+        try:
+            param = stability_param(argv.custom_action_param)
+            settled, waited = wait_for_screen(context.tasker.controller, None, param['timeout_ms'],
+                                              stable_threshold=param['stable_threshold'], roi=param['roi'],
+                                              stable_frames=param['stable_frames'], poll_ms=param['poll_ms'])
+            MaaLog_Debug(f"wait_screen_stable [{argv.node_name}]: "
+                         f"{'settled' if settled else 'timed out'} after {waited:.0f} ms")
+            return CustomAction.RunResult(success=True)
+
+        except Exception as e:
+            MaaLog_Debug(f"Exception occurred during wait_screen_stable action execution: {e}")
+            traceback.print_exc()
+            return CustomAction.RunResult(success=False)
+
+@AgentServer.custom_recognition("screen_stable")
+class ScreenStableRecognition(CustomRecognition):
+    """
+    Hits once the node's roi has been unchanged for a number of screencaps
+
+    Takes the same custom_recognition_param as wait_screen_stable, with the
+    node's roi used when the param has none and a 500 ms default timeout, as
+    the wait holds up the rest of the next list. Misses after the timeout, so
+    the node's own action only runs on a settled screen.
+    """
+
+    def analyze(
+        self,
+        context: Context,
+        argv: CustomRecognition.AnalyzeArg,
+    ) -> CustomRecognition.AnalyzeResult:
+        param = stability_param(argv.custom_recognition_param, RECOGNITION_TIMEOUT_MS)
+        roi = param['roi'] or [argv.roi.x, argv.roi.y, argv.roi.w, argv.roi.h]
+        if roi[2] <= 0 or roi[3] <= 0:
+            roi = [0, 0, argv.image.shape[1], argv.image.shape[0]]
+
+        # The frame being recognized counts as the first unchanged frame
+        settled, waited = wait_for_screen(context.tasker.controller, None, param['timeout_ms'],
+                                          stable_threshold=param['stable_threshold'], roi=roi,
+                                          stable_frames=param['stable_frames'], poll_ms=param['poll_ms'],
+                                          first=frame_signature(argv.image, roi))
+        detail = json.dumps({"settled": settled, "waited_ms": round(waited)})
+        if not settled:
+            return CustomRecognition.AnalyzeResult(box=None, detail=detail)
+        return CustomRecognition.AnalyzeResult(box=tuple(roi), detail=detail)
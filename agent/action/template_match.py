@@ -0,0 +1,244 @@
+from .include import *
+import threading
+from pathlib import Path
+from maa.custom_recognition import CustomRecognition
+
+from .log import MaaLog_Debug
+
+# Coarse candidates refined at full resolution, per template
+REFINE_CANDIDATES = 5
+
+# Smallest template side kept at the coarsest pyramid level
+MIN_COARSE_SIDE = 8
+
+# Windows (and templates) whose gray levels vary less than this carry no pattern to match
+FLAT_STD = 1.0
+
+def project_root():
+    """Project root, as in main.py: agent/ in development, agent/dist/ when packaged"""
+    if getattr(sys, 'frozen', False):
+        return Path(sys.executable).resolve().parents[2]
+    return Path(__file__).resolve().parents[2]
+
+def image_dir(bundle="resource"):
+    """image/ of a resource bundle, installed layout first, then the repository layout"""
+    root = project_root()
+    for candidate in (root / bundle / "image", root / "assets" / bundle / "image"):
+        if candidate.exists():
+            return candidate
+    return root / bundle / "image"
+
+def to_gray(rgb):
+    """Luma of an RGB array, as cv2.cvtColor computes it"""
+    return rgb[..., 0] * np.float32(0.299) + rgb[..., 1] * np.float32(0.587) + rgb[..., 2] * np.float32(0.114)
+
+def downscale(array, factor):
+    """Block mean over factor x factor blocks, dropping the remainder"""
+    if factor == 1:
+        return array
+    h, w = array.shape[0] // factor, array.shape[1] // factor
+    return array[:h * factor, :w * factor].reshape(h, factor, w, factor).mean(axis=(1, 3))
+
+def window_sums(values, h, w):
+    """Sum of every h x w window, through a summed-area table"""
+    table = np.zeros((values.shape[0] + 1, values.shape[1] + 1))
+    table[1:, 1:] = values.cumsum(0).cumsum(1)
+    return table[h:, w:] - table[:-h, w:] - table[h:, :-w] + table[:-h, :-w]
+
+def correlate(spectrum, kernel, shape):
+    """Valid-mode cross-correlation of an image, given its rfft2, with a smaller kernel"""
+    H, W = shape
+    h, w = kernel.shape
+    result = np.fft.irfft2(spectrum * np.conj(np.fft.rfft2(kernel, (H, W))), (H, W))
+    return result[:H - h + 1, :W - w + 1]
+
+def match_scores(image, template, mask=None):
+    """TM_CCOEFF_NORMED score of every position of template in a grayscale image, mask as in green_mask"""
+    H, W = image.shape
+    h, w = template.shape
+    if h > H or w > W:
+        return None
+
+    # Centering keeps the FFT rounding error small next to the windows' own variance
+    image = image.astype(np.float64)
+    image -= image.mean()
+    spectrum = np.fft.rfft2(image)
+    if mask is None:
+        n = h * w
+        kernel = template - template.mean()
+        sums = window_sums(image, h, w)
+        squares = window_sums(image ** 2, h, w)
+    else:
+        n = mask.sum()
+        if n == 0:
+            return None
+        kernel = (template - template[mask].mean()) * mask
+        weights = mask.astype(np.float64)
+        sums = correlate(spectrum, weights, (H, W))
+        squares = correlate(np.fft.rfft2(image ** 2), weights, (H, W))
+
+    energy = (kernel ** 2).sum()
+    if energy < n * FLAT_STD ** 2:
+        return np.zeros((H - h + 1, W - w + 1))
+
+    numerator = correlate(spectrum, kernel, (H, W))
+    variance = np.maximum(squares - sums ** 2 / n, 0)
+    textured = variance >= n * FLAT_STD ** 2
+    scores = numerator / np.sqrt(np.where(textured, variance, 1.0) * energy)
+    return np.where(textured, np.clip(scores, -1.0, 1.0), 0.0)
+
+class Template:
+    """Grayscale template with its green mask and pyramid levels"""
+
+    def __init__(self, name, path, green_mask):
+        with Image.open(path) as image:
+            rgb = np.asarray(image.convert("RGB"), dtype=np.float32)
+        self.name = name
+        self.gray = to_gray(rgb)
+        self.mask = None
+        if green_mask:
+            self.mask = ~np.all(rgb == (0, 255, 0), axis=2)
+        self.height, self.width = self.gray.shape
+        self._levels = {}
+
+    def level(self, factor):
+        """(template, mask) at 1/factor scale"""
+        if factor not in self._levels:
+            mask = None
+            if self.mask is not None:
+                # A coarse pixel counts once most of its block is unmasked
+                mask = downscale(self.mask.astype(np.float32), factor) >= 0.5
+            self._levels[factor] = (downscale(self.gray, factor), mask)
+        return self._levels[factor]
+
+class TemplateSet:
+    """Templates loaded once per (name, green_mask) and shared by every call"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._templates = {}
+
+    def get(self, name, green_mask=False, bundle="resource"):
+        key = (bundle, name, green_mask)
+        with self._lock:
+            if key not in self._templates:
+                self._templates[key] = Template(name, image_dir(bundle) / name, green_mask)
+            return self._templates[key]
+
+# Global template set instance
+_global_templates = TemplateSet()
+
+def get_global_templates():
+    """Get global template set instance"""
+    return _global_templates
+
+def coarse_factor(templates, levels):
+    """Largest power-of-two scale, up to 2^levels, that keeps every template at least MIN_COARSE_SIDE"""
+    factor = 1
+    smallest = min(min(t.height, t.width) for t in templates)
+    while levels > 0 and smallest // (factor * 2) >= MIN_COARSE_SIDE:
+        factor *= 2
+        levels -= 1
+    return factor
+
+def search(gray, coarse_gray, template, factor):
+    """Best (score, x, y) of template in gray, found in coarse_gray at 1/factor scale and refined at full resolution"""
+    if factor == 1:
+        scores = match_scores(gray, template.gray, template.mask)
+        if scores is None:
+            return 0.0, 0, 0
+        y, x = np.unravel_index(np.argmax(scores), scores.shape)
+        return float(scores[y, x]), int(x), int(y)
+
+    coarse_template, coarse_mask = template.level(factor)
+    coarse = match_scores(coarse_gray, coarse_template, coarse_mask)
+    if coarse is None:
+        return 0.0, 0, 0
+
+    flat = coarse.ravel()
+    count = min(REFINE_CANDIDATES, flat.size)
+    best = (0.0, 0, 0)
+    for index in np.argpartition(flat, -count)[-count:]:
+        cy, cx = (int(v) for v in np.unravel_index(index, coarse.shape))
+        # Every full-resolution position that falls into this coarse cell, plus one coarse cell around it
+        left = max(cx * factor - factor, 0)
+        top = max(cy * factor - factor, 0)
+        right = min(cx * factor + 2 * factor + template.width, gray.shape[1])
+        bottom = min(cy * factor + 2 * factor + template.height, gray.shape[0])
+        scores = match_scores(gray[top:bottom, left:right], template.gray, template.mask)
+        if scores is None:
+            continue
+        y, x = np.unravel_index(np.argmax(scores), scores.shape)
+        if scores[y, x] > best[0]:
+            best = (float(scores[y, x]), left + int(x), top + int(y))
+    return best
+
+@AgentServer.custom_recognition("multi_template_match")
+class MultiTemplateMatchRecognition(CustomRecognition):
+    """
+    Several templates searched in one roi in one call.
+
+    custom_recognition_param:
+        template:   template path or list of paths under image/, as in TemplateMatch
+        threshold:  minimum score (default 0.7)
+        green_mask: ignore pure green template pixels (default false)
+        levels:     pyramid levels for the coarse search (default 2, 0 searches at full resolution only)
+        bundle:     resource bundle to load templates from (default "resource")
+
+    Templates are cached as grayscale arrays; scores are TM_CCOEFF_NORMED on
+    grayscale, so they run slightly lower than the framework's color scores.
+    The node's roi is searched, the whole frame without one. The box is the
+    best match over all templates; detail holds its index and every template's
+    best score.
+    """
+
+    def analyze(
+        self,
+        context: Context,
+        argv: CustomRecognition.AnalyzeArg,
+    ) -> CustomRecognition.AnalyzeResult:
+        param = argv.custom_recognition_param
+        if isinstance(param, str):
+            param = json.loads(param) if param else {}
+
+        names = param.get("template", [])
+        names = [names] if isinstance(names, str) else names
+        if not names:
+            return CustomRecognition.AnalyzeResult(box=None, detail="")
+
+        try:
+            templates = [
+                _global_templates.get(name, param.get("green_mask", False), param.get("bundle", "resource"))
+                for name in names
+            ]
+        except OSError as e:
+            MaaLog_Debug(f"multi_template_match [{argv.node_name}]: cannot load templates: {e}")
+            return CustomRecognition.AnalyzeResult(box=None, detail="")
+
+        height, width = argv.image.shape[:2]
+        x, y, w, h = argv.roi.x, argv.roi.y, argv.roi.w, argv.roi.h
+        if w <= 0 or h <= 0:
+            x, y, w, h = 0, 0, width, height
+
+        # One grayscale conversion and one downscale of the roi serve every template
+        gray = to_gray(argv.image[y:y + h, x:x + w, ::-1].astype(np.float32))
+        factor = coarse_factor(templates, param.get("levels", 2))
+        coarse_gray = downscale(gray, factor)
+
+        results = [search(gray, coarse_gray, template, factor) for template in templates]
+        best = max(range(len(results)), key=lambda i: results[i][0])
+        score, bx, by = results[best]
+
+        detail = json.dumps({
+            "index": best,
+            "template": names[best],
+            "score": round(score, 4),
+            "scores": [round(r[0], 4) for r in results],
+        }, ensure_ascii=False)
+
+        if score < param.get("threshold", 0.7):
+            return CustomRecognition.AnalyzeResult(box=None, detail=detail)
+        return CustomRecognition.AnalyzeResult(
+            box=(x + bx, y + by, templates[best].width, templates[best].height),
+            detail=detail,
+        )
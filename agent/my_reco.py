@@ -2,6 +2,12 @@ from maa.agent.agent_server import AgentServer
 from maa.custom_recognition import CustomRecognition
 from maa.context import Context
 
+import json
+
+import numpy as np
+
+from action import cached_run_recognition, get_frame_color_stats
+
 
 @AgentServer.custom_recognition("my_reco_222")
 class MyRecongition(CustomRecognition):
@@ -12,7 +18,9 @@ class MyRecongition(CustomRecognition):
         argv: CustomRecognition.AnalyzeArg,
     ) -> CustomRecognition.AnalyzeResult:
 
-        reco_detail = context.run_recognition(
+        # Identical recognitions on the same frame are served from the recognition cache
+        reco_detail = cached_run_recognition(
+            context,
             "MyCustomOCR",
             argv.image,
             pipeline_override={"MyCustomOCR": {"roi": [100, 100, 200, 300]}},
@@ -35,3 +43,99 @@ class MyRecongition(CustomRecognition):
         return CustomRecognition.AnalyzeResult(
             box=(0, 0, 100, 100), detail="Hello World!"
         )
+
+
+@AgentServer.custom_recognition("multi_color_match")
+class MultiColorMatchRecognition(CustomRecognition):
+    """
+    Several ColorMatch checks evaluated on one frame.
+
+    custom_recognition_param:
+        checks: [{"name": ..., "roi": [x, y, w, h], "lower": [r, g, b], "upper": [r, g, b],
+                  "count": 1, "next": [...]}, ...]
+        mode:   "any" (default) hits when one check hits, "all" when every check hits
+
+    Bounds are RGB like ColorMatch's default method; "connected" is not supported.
+    A roi is clipped to the frame, and a missing or zero-size roi is the whole frame.
+    The box is the matched pixels of the first check that hits. A hit check with
+    "next" overrides this node's next list, so one node can replace a fan-out of
+    ColorMatch candidates; when the hit check has none, the node's own next list
+    is restored, so an earlier override never outlives the check that made it.
+    """
+
+    def __init__(self):
+        super().__init__()
+        # Node next lists as the task started, before any check overrode them
+        self._task_id = None
+        self._original_next = {}
+
+    def _task_start_next(self, context, node_name):
+        """next list of node_name before this task's first override"""
+        try:
+            task_id = context.get_task_job().job_id
+        except ValueError:
+            task_id = None
+        if task_id != self._task_id:
+            self._task_id = task_id
+            self._original_next = {}
+        if node_name not in self._original_next:
+            node = context.get_node_data(node_name) or {}
+            self._original_next[node_name] = node.get("next", [])
+        return self._original_next[node_name]
+
+    def analyze(
+        self,
+        context: Context,
+        argv: CustomRecognition.AnalyzeArg,
+    ) -> CustomRecognition.AnalyzeResult:
+        param = argv.custom_recognition_param
+        if isinstance(param, str):
+            param = json.loads(param) if param else {}
+
+        checks = param.get("checks", [])
+        if not checks:
+            return CustomRecognition.AnalyzeResult(box=None, detail="")
+        overrides_next = any("next" in check for check in checks)
+        if overrides_next:
+            # Snapshot the node's next list before any check of this task overrides it
+            default_next = self._task_start_next(context, argv.node_name)
+
+        # Checks on the same frame share its color statistics, one roi slice per check
+        height, width = argv.image.shape[:2]
+        stats = get_frame_color_stats(argv.image)
+        rois = []
+        for check in checks:
+            x, y, w, h = check.get("roi", [0, 0, width, height])
+            if w <= 0 or h <= 0:
+                # Like ColorMatch, a zero-size roi is the whole frame
+                x, y, w, h = 0, 0, width, height
+            # Clip to the frame; a negative x or y shrinks the roi instead of moving it
+            left, top = min(max(x, 0), width), min(max(y, 0), height)
+            w, h = max(min(x + w, width) - left, 0), max(min(y + h, height) - top, 0)
+            rois.append((left, top, w, h))
+        counts = [stats.count(roi, check["lower"], check["upper"]) for roi, check in zip(rois, checks)]
+
+        hits = [i for i, check in enumerate(checks) if counts[i] >= check.get("count", 1)]
+        names = [check.get("name", str(i)) for i, check in enumerate(checks)]
+        detail = json.dumps({
+            "hits": [names[i] for i in hits],
+            "counts": dict(zip(names, counts)),
+        }, ensure_ascii=False)
+
+        if not hits or (param.get("mode", "any") == "all" and len(hits) != len(checks)):
+            return CustomRecognition.AnalyzeResult(box=None, detail=detail)
+
+        first = hits[0]
+        x, y, w, h = rois[first]
+        mask = stats.mask(rois[first], checks[first]["lower"], checks[first]["upper"])
+        ys, xs = np.nonzero(mask)
+        if len(xs):
+            box = (x + int(xs.min()), y + int(ys.min()), int(xs.max() - xs.min()) + 1, int(ys.max() - ys.min()) + 1)
+        else:
+            # "count": 0 hits without a matched pixel
+            box = (x, y, w, h)
+
+        if overrides_next:
+            context.override_next(argv.node_name, checks[first].get("next", default_next))
+
+        return CustomRecognition.AnalyzeResult(box=box, detail=detail)
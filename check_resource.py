@@ -1,37 +1,197 @@
 import sys
+import json
+import hashlib
+import argparse
 
-from typing import List
+from typing import Dict, List, Optional
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 
+from maa.library import Library
 from maa.resource import Resource
 from maa.tasker import Tasker, LoggingLevelEnum
 
+from compile_pipeline import resolve_profile_dirs
 
-def check(dirs: List[Path]) -> bool:
-    resource = Resource()
+default_manifest = Path(__file__).parent / ".check_resource_manifest.json"
 
-    print(f"Checking {len(dirs)} directories...")
+# Bundle entries whose content decides whether a directory must be re-checked
+CHECKED_ENTRIES = ["default_pipeline.json", "pipeline", "image"]
+
+
+def hash_bundle(dir: Path) -> Dict[str, str]:
+    """Return relative path -> sha256 for every checked file of a bundle dir"""
+    hashes = {}
+    for entry in CHECKED_ENTRIES:
+        path = dir / entry
+        files = [path] if path.is_file() else sorted(p for p in path.rglob("*") if p.is_file())
+        for file in files:
+            hashes[file.relative_to(dir).as_posix()] = hashlib.sha256(file.read_bytes()).hexdigest()
+    return hashes
+
+
+def hash_stack(stack: List[Path], cache: Dict[Path, Dict[str, str]]) -> Dict[str, str]:
+    """
+    Hashes of every checked file of a bundle stack, prefixed with the bundle's position,
+    so a change in any bundle, or in their order, invalidates the whole stack.
+    """
+    hashes = {}
+    for i, dir in enumerate(stack):
+        dir = dir.resolve()
+        if dir not in cache:
+            cache[dir] = hash_bundle(dir)
+        for name, digest in cache[dir].items():
+            hashes[f"{i}:{dir.name}/{name}"] = digest
+    return hashes
+
+
+def input_hashes(interface_path: Optional[Path] = None) -> Dict[str, str]:
+    """
+    Hashes of what decides a check besides the bundles: the MaaFramework
+    version that loads them, and the interface.json their profile comes from.
+    """
+    hashes = {"maa": Library.version()}
+    if interface_path:
+        hashes["interface.json"] = hashlib.sha256(interface_path.read_bytes()).hexdigest()
+    return hashes
+
+
+def stack_key(stack: List[Path], interface_path: Optional[Path] = None) -> str:
+    key = " + ".join(str(dir.resolve()) for dir in stack)
+    return f"{interface_path.resolve()}: {key}" if interface_path else key
+
+
+def interface_stacks(interface_path: Path) -> Dict[str, List[Path]]:
+    """Profile name -> ordered bundle dirs of every resource profile of an interface.json"""
+    with open(interface_path, "r", encoding="utf-8") as f:
+        interface = json.load(f)
+    return {
+        profile["name"]: resolve_profile_dirs(profile, interface_path.parent)
+        for profile in interface.get("resource", [])
+    }
+
+
+def load_manifest(path: Path) -> dict:
+    if not path.exists():
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        print(f"Ignoring unreadable manifest {path}.")
+        return {}
+
+
+def save_manifest(path: Path, manifest: dict):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1, sort_keys=True)
+
+
+def changed_files(old: Dict[str, str], new: Dict[str, str]) -> List[str]:
+    return sorted(name for name in old.keys() | new.keys() if old.get(name) != new.get(name))
 
-    for dir in dirs:
-        print(f"Checking {dir}...")
-        status = resource.post_bundle(dir).wait().status
-        if not status.succeeded:
-            print(f"Failed to check {dir}.")
-            return False
 
-    print("All directories checked.")
+def _init_worker():
+    Tasker.set_stdout_level(LoggingLevelEnum.All)
+
+
+def check_bundle(stack: List[Path]) -> bool:
+    """Load a bundle stack in order into one Resource, as MFA loads a resource profile"""
+    resource = Resource()
+    for dir in stack:
+        if not resource.post_bundle(dir).wait().status.succeeded:
+            print(f"Failed to load {dir}.")
+            return False
     return True
 
 
+def check(
+    stacks: Dict[str, List[Path]],
+    jobs: int = 0,
+    manifest_path: Optional[Path] = None,
+    interfaces: Optional[Dict[str, Path]] = None,
+    full: bool = False,
+) -> bool:
+    """
+    Check resource bundle stacks, name -> bundle dirs in load order.
+    With a manifest, stacks whose pipeline/image files are unchanged in every
+    bundle since their last successful check, under the same MaaFramework
+    version and the same interface.json (interfaces: name -> interface.json
+    of the stack's profile), are skipped; full checks every stack and still
+    records the results. Remaining stacks are checked in parallel, each in
+    its own process with its own Resource.
+    """
+    interfaces = interfaces or {}
+    manifest = load_manifest(manifest_path) if manifest_path else {}
+    previous = {} if full else manifest
+    dir_hashes = {}
+    hashes = {}
+    pending = []
+
+    print(f"Checking {len(stacks)} resources...")
+
+    for name, stack in stacks.items():
+        key = stack_key(stack, interfaces.get(name))
+        hashes[key] = {**input_hashes(interfaces.get(name)), **hash_stack(stack, dir_hashes)}
+        changed = changed_files(previous.get(key, {}), hashes[key])
+        if not changed:
+            print(f"Skipping {name}, unchanged since last check.")
+            continue
+
+        print(f"Checking {name} ({len(changed)} changed files)...")
+        pending.append(name)
+
+    if not pending:
+        print("All resources checked.")
+        return True
+
+    jobs = min(jobs or len(pending), len(pending))
+    if jobs == 1:
+        _init_worker()
+        results = [check_bundle(stacks[name]) for name in pending]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker) as executor:
+            results = list(executor.map(check_bundle, [stacks[name] for name in pending]))
+
+    succeeded = True
+    for name, ok in zip(pending, results):
+        if ok:
+            key = stack_key(stacks[name], interfaces.get(name))
+            manifest[key] = hashes[key]
+        else:
+            print(f"Failed to check {name}.")
+            succeeded = False
+
+    if manifest_path:
+        save_manifest(manifest_path, manifest)
+
+    if succeeded:
+        print("All resources checked.")
+    return succeeded
+
+
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python configure.py <directory>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Check MaaFramework resource bundles.")
+    parser.add_argument("dirs", nargs="*", type=Path, help="standalone resource bundle directories")
+    parser.add_argument("--interface", type=Path, action="append", default=[],
+                        help="also check every resource profile of this interface.json as its bundle stack")
+    parser.add_argument("-j", "--jobs", type=int, default=0, help="parallel workers (default: one per resource)")
+    parser.add_argument("--manifest", type=Path, default=default_manifest, help="content-hash manifest path")
+    parser.add_argument("--full", action="store_true", help="check every resource regardless of the manifest, then update it")
+    args = parser.parse_args()
+
+    stacks = {str(dir): [dir] for dir in args.dirs}
+    interfaces = {}
+    for interface_path in args.interface:
+        for name, stack in interface_stacks(interface_path).items():
+            stacks[f"{interface_path}: {name}"] = stack
+            interfaces[f"{interface_path}: {name}"] = interface_path
+    if not stacks:
+        parser.error("give bundle directories or --interface")
 
     Tasker.set_stdout_level(LoggingLevelEnum.All)
 
-    dirs = [Path(arg) for arg in sys.argv[1:]]
-    if not check(dirs):
+    if not check(stacks, args.jobs, args.manifest, interfaces, args.full):
         sys.exit(1)
 
 
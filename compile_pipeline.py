@@ -0,0 +1,479 @@
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+import argparse
+import ast
+import hashlib
+import itertools
+import json
+import shutil
+import sys
+
+assets_dir = Path(__file__).parent.resolve() / "assets"
+agent_dir = Path(__file__).parent.resolve() / "agent"
+
+# Fields whose values name other pipeline nodes
+EDGE_FIELDS = ("next", "interrupt", "on_error")
+
+# Fields that may name another node whose result they reuse, instead of a literal value
+REFERENCE_FIELDS = ("roi", "target")
+
+# Placeholder used by interface.json resource paths
+PROJECT_DIR = "{PROJECT_DIR}"
+
+
+def strip_comments(text: str) -> str:
+    """Remove // and /* */ comments from JSONC text, leaving string literals intact"""
+    out = []
+    i = 0
+    n = len(text)
+    in_string = False
+
+    while i < n:
+        c = text[i]
+        if in_string:
+            out.append(c)
+            if c == "\\" and i + 1 < n:
+                out.append(text[i + 1])
+                i += 2
+                continue
+            if c == '"':
+                in_string = False
+            i += 1
+        elif c == '"':
+            in_string = True
+            out.append(c)
+            i += 1
+        elif text.startswith("//", i):
+            end = text.find("\n", i)
+            i = n if end < 0 else end
+        elif text.startswith("/*", i):
+            end = text.find("*/", i + 2)
+            i = n if end < 0 else end + 2
+        else:
+            out.append(c)
+            i += 1
+
+    return "".join(out)
+
+
+def load_jsonc(path: Path):
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    try:
+        return json.loads(strip_comments(text))
+    except json.JSONDecodeError as e:
+        raise ValueError(f"{path}: {e}") from None
+
+
+def edge_targets(node: dict, field: str) -> List[str]:
+    """Return the node names listed in an edge field, accepting a bare string"""
+    value = node.get(field, [])
+    if isinstance(value, str):
+        return [value]
+    return list(value)
+
+
+def node_references(node: dict, fields: Iterable[str] = EDGE_FIELDS + REFERENCE_FIELDS) -> List[str]:
+    """Names of the nodes a node depends on through the given fields"""
+    names = []
+    for field in fields:
+        if field in EDGE_FIELDS:
+            names += edge_targets(node, field)
+        elif isinstance(node.get(field), str):
+            names.append(node[field])
+    return names
+
+
+def reachable(nodes: Dict[str, dict], entries: Iterable[str], fields: Iterable[str] = EDGE_FIELDS) -> Set[str]:
+    """Names of all nodes reachable from entries through the given fields"""
+    seen = set()
+    stack = [e for e in entries if e in nodes]
+    while stack:
+        name = stack.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        stack.extend(t for t in node_references(nodes[name], fields) if t in nodes and t not in seen)
+    return seen
+
+
+def load_pipeline(bundle_dir: Path) -> Tuple[Dict[str, dict], Dict[str, Path]]:
+    """
+    Load every node under bundle_dir/pipeline.
+    Returns (nodes, sources) where sources maps node name -> defining file.
+    """
+    nodes = {}
+    sources = {}
+
+    pipeline_dir = Path(bundle_dir) / "pipeline"
+    if not pipeline_dir.exists():
+        return nodes, sources
+
+    for path in sorted(pipeline_dir.rglob("*.json")):
+        data = load_jsonc(path)
+        if not isinstance(data, dict):
+            raise ValueError(f"{path}: top level must be an object")
+
+        for name, node in data.items():
+            if name in sources:
+                raise ValueError(f"{path}: node \"{name}\" already defined in {sources[name]}")
+            nodes[name] = node
+            sources[name] = path
+
+    return nodes, sources
+
+
+def merge_layers(layers: List[Dict[str, dict]]) -> Dict[str, dict]:
+    """
+    Stack pipeline layers in load order.
+    Like MaaFramework, a node redefined by a later bundle overrides field by field.
+    """
+    merged = {}
+    for layer in layers:
+        for name, node in layer.items():
+            if name in merged:
+                merged[name] = {**merged[name], **node}
+            else:
+                merged[name] = dict(node)
+    return merged
+
+
+def validate_nodes(nodes: Dict[str, dict]) -> List[str]:
+    """Return a list of human-readable errors, empty if the pipeline is consistent"""
+    errors = []
+
+    for name, node in nodes.items():
+        if not isinstance(node, dict):
+            errors.append(f"\"{name}\": node must be an object")
+            continue
+
+        for field in EDGE_FIELDS:
+            value = node.get(field, [])
+            if isinstance(value, str):
+                value = [value]
+            if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+                errors.append(f"\"{name}\": \"{field}\" must be a string or a list of strings")
+                continue
+
+            for target in value:
+                if target not in nodes:
+                    errors.append(f"\"{name}\": {field} -> \"{target}\" does not exist")
+
+    return errors
+
+
+def resolve_profile_dirs(profile: dict, project_dir: Path) -> List[Path]:
+    """Map the {PROJECT_DIR} paths of an interface.json resource profile to real dirs"""
+    dirs = []
+    for path in profile.get("path", []):
+        relative = path.replace(PROJECT_DIR, "").strip("/\\")
+        dirs.append(Path(project_dir) / relative)
+    return dirs
+
+
+def find_profile(interface: dict, name: str = None) -> dict:
+    """Return the named resource profile, or the first one when name is None"""
+    for profile in interface.get("resource", []):
+        if name is None or profile.get("name") == name:
+            return profile
+    raise ValueError(f"Resource \"{name}\" not found in interface.json")
+
+
+def load_layers(profile: dict, project_dir: Path) -> List[Tuple[Path, Dict[str, dict], Dict[str, Path]]]:
+    """(bundle dir, nodes, sources) of every bundle of a resource profile, in load order"""
+    layers = []
+    for d in resolve_profile_dirs(profile, project_dir):
+        nodes, sources = load_pipeline(d)
+        layers.append((d, nodes, sources))
+    return layers
+
+
+def load_profile(profile: dict, project_dir: Path) -> Tuple[Dict[str, dict], Dict[str, Path]]:
+    """
+    Load and merge every bundle of a resource profile.
+    sources maps node name -> file of the last bundle that defined it.
+    """
+    layers = load_layers(profile, project_dir)
+    sources = {}
+    for _, _, layer_sources in layers:
+        sources.update(layer_sources)
+    return merge_layers([nodes for _, nodes, _ in layers]), sources
+
+
+def provenance(layers: List[Tuple[Path, Dict[str, dict], Dict[str, Path]]],
+               project_dir: Path) -> Dict[str, Dict[str, str]]:
+    """Node name -> field -> file that set its merged value, relative to project_dir"""
+    result = {}
+    for _, nodes, sources in layers:
+        for name, node in nodes.items():
+            path = Path(sources[name]).resolve().relative_to(Path(project_dir).resolve()).as_posix()
+            fields = result.setdefault(name, {})
+            for field in node:
+                fields[field] = path
+    return result
+
+
+def stale_overrides(layers: List[Tuple[Path, Dict[str, dict], Dict[str, Path]]],
+                    interface: dict = None) -> List[str]:
+    """
+    Nodes an overlay bundle defines although no earlier bundle does and nothing uses them.
+    These are usually overrides left behind after the base node was renamed or removed.
+    """
+    merged = merge_layers([nodes for _, nodes, _ in layers])
+    used = set()
+    for name, node in merged.items():
+        used.update(target for target in node_references(node) if target != name)
+    for task in (interface or {}).get("task", []):
+        used.add(task["entry"])
+        for override in task_overrides(interface, task):
+            used.update(override)
+
+    errors = []
+    defined = set()
+    for i, (_, nodes, sources) in enumerate(layers):
+        for name in nodes:
+            if i > 0 and name not in defined and name not in used:
+                errors.append(f"\"{name}\": overrides a node no earlier bundle defines ({sources[name]})")
+        defined.update(nodes)
+    return errors
+
+
+def compile_profile(profile: dict, project_dir: Path, interface: dict = None) -> Dict[str, dict]:
+    return compile_layers(profile, load_layers(profile, project_dir), interface)
+
+
+def compile_layers(profile: dict, layers: List[Tuple[Path, Dict[str, dict], Dict[str, Path]]],
+                   interface: dict = None) -> Dict[str, dict]:
+    """Merge and validate the loaded bundles of a resource profile"""
+    nodes = merge_layers([layer for _, layer, _ in layers])
+
+    errors = validate_nodes(nodes) + stale_overrides(layers, interface)
+    if errors:
+        raise ValueError(
+            f"Resource \"{profile.get('name')}\" failed validation:\n  " + "\n  ".join(errors)
+        )
+
+    return nodes
+
+
+def task_overrides(interface: dict, task: dict) -> List[Dict[str, dict]]:
+    """Every pipeline_override a task can apply through its options and advanced fields"""
+    overrides = []
+    for name in task.get("option", []):
+        for case in interface.get("option", {}).get(name, {}).get("cases", []):
+            overrides.append(case.get("pipeline_override", {}))
+    for name in task.get("advanced", []):
+        overrides.append(interface.get("advanced", {}).get(name, {}).get("pipeline_override", {}))
+    return overrides
+
+
+def apply_overrides(nodes: Dict[str, dict], overrides: Iterable[Dict[str, dict]],
+                    union_edges: bool = False) -> Dict[str, dict]:
+    """
+    Copy of nodes with pipeline overrides applied in order.
+    With union_edges, edge lists of all overrides are unioned so alternative
+    cases stay reachable; otherwise each override replaces fields as at runtime.
+    """
+    result = {name: dict(node) for name, node in nodes.items()}
+    for override in overrides:
+        for name, body in override.items():
+            node = result.setdefault(name, {})
+            for field, value in body.items():
+                if union_edges and field in EDGE_FIELDS:
+                    merged = edge_targets(node, field)
+                    merged += [t for t in edge_targets(body, field) if t not in merged]
+                    node[field] = merged
+                else:
+                    node[field] = value
+    return result
+
+
+def agent_references(nodes: Dict[str, dict], source_dir: Path = agent_dir) -> Set[str]:
+    """
+    Nodes the agent's Python code names in string literals, such as entries it
+    passes to context.run_recognition(). No pipeline edge leads to them.
+    """
+    names = set()
+    for path in sorted(Path(source_dir).rglob("*.py")):
+        tree = ast.parse(path.read_text(encoding="utf-8"), filename=str(path))
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Constant) and isinstance(node.value, str) and node.value in nodes:
+                names.add(node.value)
+    return names
+
+
+def task_closure(nodes: Dict[str, dict], interface: dict, task: dict, keep: Iterable[str] = ()) -> Set[str]:
+    """
+    Nodes a task can ever touch: everything reachable from its entry, from
+    the nodes its options override, under any option case, and from keep.
+    """
+    overrides = task_overrides(interface, task)
+    graph = apply_overrides(nodes, overrides, union_edges=True)
+    roots = [task["entry"]] + [name for override in overrides for name in override] + list(keep)
+    return reachable(graph, roots, EDGE_FIELDS + REFERENCE_FIELDS)
+
+
+def select_tasks(interface: dict, names: Iterable[str]) -> dict:
+    """Copy of interface.json with only the named tasks, in interface order"""
+    names = list(names)
+    tasks = [task for task in interface.get("task", []) if task.get("name") in names]
+    for name in names:
+        if not any(task["name"] == name for task in tasks):
+            raise ValueError(f"Task \"{name}\" not found in interface.json")
+    return {**interface, "task": tasks}
+
+
+def lean_nodes(nodes: Dict[str, dict], interface: dict) -> Dict[str, dict]:
+    """
+    Only the nodes the tasks of interface can reach.
+    Nodes the agent references are always kept, since custom recognitions and
+    actions may run them on behalf of any task.
+    """
+    keep = agent_references(nodes)
+    closure = set()
+    for task in interface.get("task", []):
+        if task["entry"] not in nodes:
+            raise ValueError(f"Task \"{task['name']}\": entry \"{task['entry']}\" does not exist")
+        closure |= task_closure(nodes, interface, task, keep)
+    return {name: node for name, node in nodes.items() if name in closure}
+
+
+def compile_task(profile: dict, project_dir: Path, interface: dict, task: dict) -> Dict[str, dict]:
+    """Compile only the part of a profile's pipeline that a single task needs"""
+    nodes = compile_profile(profile, project_dir, interface)
+    return lean_nodes(nodes, {**interface, "task": [task]})
+
+
+def option_combinations(interface: dict, task: dict) -> Iterator[Dict[str, str]]:
+    """Every option name -> case name choice a task can start with"""
+    names = task.get("option", [])
+    cases = [[c["name"] for c in interface.get("option", {}).get(n, {}).get("cases", [])] for n in names]
+    for choice in itertools.product(*cases):
+        yield dict(zip(names, choice))
+
+
+def merge_overrides(overrides: Iterable[Dict[str, dict]]) -> Dict[str, dict]:
+    """Collapse pipeline overrides applied in order into a single equivalent one"""
+    merged = {}
+    for override in overrides:
+        for name, body in override.items():
+            merged[name] = {**merged.get(name, {}), **body}
+    return merged
+
+
+def validate_options(nodes: Dict[str, dict], interface: dict, task: dict):
+    """
+    Check the merged override of every option combination of a task.
+    Raises ValueError if a combination overrides nodes, or points edges at
+    nodes, that do not exist.
+    """
+    options = interface.get("option", {})
+    errors = []
+    for choices in option_combinations(interface, task):
+        override = merge_overrides(
+            next(c for c in options[name]["cases"] if c["name"] == case).get("pipeline_override", {})
+            for name, case in choices.items()
+        )
+        for name, body in override.items():
+            if name not in nodes:
+                errors.append(f"{choices}: overrides \"{name}\", which does not exist")
+            for field in EDGE_FIELDS:
+                for target in edge_targets(body, field):
+                    if target not in nodes and target not in override:
+                        errors.append(f"{choices}: \"{name}\": {field} -> \"{target}\" does not exist")
+
+    if errors:
+        raise ValueError(f"Task \"{task['name']}\" has invalid option combinations:\n  " + "\n  ".join(errors))
+
+
+def content_hash(nodes: Dict[str, dict]) -> str:
+    canonical = json.dumps(nodes, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def write_bundle(nodes: Dict[str, dict], output_dir: Path, sources: Dict[str, Dict[str, str]] = None) -> str:
+    """
+    Write a compiled bundle to output_dir/<hash>/pipeline/pipeline.json.
+    Returns the content hash; bundles with identical content share a directory.
+    With sources, the provenance of every field is written to <hash>/provenance.json,
+    outside the pipeline dir so MaaFramework does not load it.
+    """
+    digest = content_hash(nodes)
+    pipeline_dir = Path(output_dir) / digest / "pipeline"
+    pipeline_dir.mkdir(parents=True, exist_ok=True)
+
+    with open(pipeline_dir / "pipeline.json", "w", encoding="utf-8") as f:
+        json.dump(nodes, f, ensure_ascii=False, separators=(",", ":"))
+
+    if sources is not None:
+        with open(pipeline_dir.parent / "provenance.json", "w", encoding="utf-8") as f:
+            json.dump({name: sources[name] for name in nodes if name in sources},
+                      f, ensure_ascii=False, indent=1, sort_keys=True)
+
+    return digest
+
+
+def compile_interface(interface: dict, project_dir: Path, output_dir: Path,
+                      tasks: Iterable[str] = None) -> Dict[str, str]:
+    """
+    Compile one pre-merged bundle per resource profile of interface.json.
+    With tasks, each bundle is lean: only the nodes those tasks can reach.
+    Every option combination of the selected tasks is validated against the
+    bundle. Returns profile name -> bundle hash.
+    """
+    selected = select_tasks(interface, tasks) if tasks else interface
+    shutil.rmtree(output_dir, ignore_errors=True)
+
+    bundles = {}
+    for profile in interface.get("resource", []):
+        layers = load_layers(profile, project_dir)
+        # Validate against every task, then keep what the selected ones need
+        nodes = compile_layers(profile, layers, interface)
+        if tasks:
+            nodes = lean_nodes(nodes, selected)
+        digest = write_bundle(nodes, output_dir, provenance(layers, project_dir))
+        for task in selected.get("task", []):
+            validate_options(nodes, selected, task)
+        bundles[profile["name"]] = digest
+
+    return bundles
+
+
+def ignore_pipeline(root: Path):
+    """shutil.copytree ignore callback that skips the top-level pipeline dir of a bundle"""
+    root = Path(root).resolve()
+
+    def _ignore(directory, names):
+        if Path(directory).resolve() == root and "pipeline" in names:
+            return ["pipeline"]
+        return []
+
+    return _ignore
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile pipeline bundles.")
+    parser.add_argument("output", nargs="?", type=Path, default=Path("compiled"), help="output directory")
+    parser.add_argument("--task", action="append",
+                        help="only compile the nodes this interface.json task can reach (repeatable)")
+    parser.add_argument("--resource", help="resource profile to compile (default: all)")
+    args = parser.parse_args()
+
+    with open(assets_dir / "interface.json", "r", encoding="utf-8") as f:
+        interface = json.load(f)
+
+    try:
+        if args.resource:
+            interface = {**interface, "resource": [find_profile(interface, args.resource)]}
+        bundles = compile_interface(interface, assets_dir, args.output, args.task)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+
+    for name, digest in bundles.items():
+        print(f"{name}: {args.output / digest}")
+
+
+if __name__ == "__main__":
+    main()
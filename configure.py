@@ -1,20 +1,54 @@
 from pathlib import Path
 
+import argparse
+import json
 import shutil
 
 assets_dir = Path(__file__).parent.resolve() / "assets"
 
+DEFAULT_OCR_MODEL = "ppocr_v5/zh_cn"
 
-def configure_ocr_model():
+
+def select_ocr_model(report_path: Path, min_accuracy: float) -> str:
+    """
+    Fastest model of a tools/pipeline/bench_ocr_models.py report that reaches min_accuracy.
+    Only det+rec runs count, since most OCR nodes do not set "only_rec".
+    """
+    with open(report_path, "r", encoding="utf-8") as f:
+        report = json.load(f)
+
+    candidates = [
+        v for v in report.get("variants", [])
+        if "error" not in v and not v.get("only_rec") and v.get("accuracy", 0) >= min_accuracy
+    ]
+    if not candidates:
+        print(f"No OCR model in {report_path} reaches {min_accuracy:.1%} accuracy, using {DEFAULT_OCR_MODEL}.")
+        return DEFAULT_OCR_MODEL
+
+    best = min(candidates, key=lambda v: (v["p50_ms"], v.get("peak_mb", 0)))
+    print(f"Selected OCR model {best['model']}: accuracy {best['accuracy']:.2%}, p50 {best['p50_ms']} ms")
+    return best["model"]
+
+
+def configure_ocr_model(model: str = DEFAULT_OCR_MODEL, force: bool = False):
     assets_ocr_dir = assets_dir / "MaaCommonAssets" / "OCR"
     if not assets_ocr_dir.exists():
         print(f"File Not Found: {assets_ocr_dir}")
         exit(1)
 
+    if not (assets_ocr_dir / model).exists():
+        print(f"File Not Found: {assets_ocr_dir / model}")
+        exit(1)
+
     ocr_dir = assets_dir / "resource" / "model" / "ocr"
-    if not ocr_dir.exists():   # copy default OCR model only if dir does not exist
+    if force and ocr_dir.exists():
+        # Remove the previous model; keys.txt is overwritten by the one matching the new model
+        for path in ocr_dir.glob("*.onnx"):
+            path.unlink()
+
+    if force or not ocr_dir.exists():   # copy default OCR model only if dir does not exist
         shutil.copytree(
-            assets_dir / "MaaCommonAssets" / "OCR" / "ppocr_v5" / "zh_cn",
+            assets_ocr_dir / model,
             ocr_dir,
             dirs_exist_ok=True,
         )
@@ -23,6 +57,19 @@ def configure_ocr_model():
 
 
 if __name__ == "__main__":
-    configure_ocr_model()
+    parser = argparse.ArgumentParser(description="Install the OCR model into assets/resource/model/ocr.")
+    parser.add_argument("--model", help=f"model dir under MaaCommonAssets/OCR (default: {DEFAULT_OCR_MODEL})")
+    parser.add_argument("--ocr-report", type=Path,
+                        help="pick the fastest model of a tools/pipeline/bench_ocr_models.py report")
+    parser.add_argument("--min-accuracy", type=float, default=0.98,
+                        help="accuracy a model needs in the report to be picked")
+    parser.add_argument("--force", action="store_true", help="replace an already installed model")
+    args = parser.parse_args()
+
+    model = args.model or DEFAULT_OCR_MODEL
+    if args.ocr_report and not args.model:
+        model = select_ocr_model(args.ocr_report, args.min_accuracy)
+
+    configure_ocr_model(model, args.force or bool(args.model or args.ocr_report))
 
     print("OCR model configured.")
@@ -1,14 +1,18 @@
 from pathlib import Path
+import argparse
 import shutil
 import sys
 import json
 import os
 
 from configure import configure_ocr_model
+from compile_pipeline import compile_interface, ignore_pipeline, select_tasks
 
 working_dir = Path(__file__).parent
 install_path = working_dir / Path("install")
-version = len(sys.argv) > 1 and sys.argv[1] or "v0.0.1"
+
+version = "v0.0.1"
+tasks = None
 
 
 def install_deps():
@@ -38,18 +42,23 @@ def install_deps():
 def install_resource():
     configure_ocr_model()
 
+    # pipeline dirs are shipped as compiled bundles, see install_pipeline_bundles()
     shutil.copytree(
         working_dir / "assets" / "resource",
         install_path / "resource",
+        ignore=ignore_pipeline(working_dir / "assets" / "resource"),
         dirs_exist_ok=True,
     )
 
     shutil.copytree(
         working_dir / "assets" / "resource_en",
         install_path / "resource_en",
+        ignore=ignore_pipeline(working_dir / "assets" / "resource_en"),
         dirs_exist_ok=True,
     )
 
+    install_optimized_images()
+
     shutil.copy2(
         working_dir / "assets" / "interface.json",
         install_path,
@@ -59,11 +68,56 @@ def install_resource():
         interface = json.load(f)
 
     interface["version"] = version
+    install_pipeline_bundles(interface)
 
     with open(install_path / "interface.json", "w", encoding="utf-8") as f:
         json.dump(interface, f, ensure_ascii=False, indent=4)
 
 
+def install_optimized_images():
+    """无损重新编码安装目录中的模板图片，像素有变化则构建失败"""
+    try:
+        from optimize_images import optimize, report
+    except ImportError:
+        print("Warning: Pillow not found, skipping template optimization.")
+        print("警告：未找到 Pillow，跳过模板优化。")
+        return
+
+    ok = True
+    for bundle in ("resource", "resource_en"):
+        image_dir = install_path / bundle / "image"
+        if image_dir.exists():
+            ok = report(image_dir, optimize(image_dir)) and ok
+
+    if not ok:
+        print("Template optimization changed pixels.")
+        print("模板优化改变了像素。")
+        sys.exit(1)
+
+
+def install_pipeline_bundles(interface):
+    """
+    预合并每个资源配置的 pipeline（记录各字段来源）并让 interface.json 加载编译结果
+    指定 --task 时只保留这些任务及其可达节点，interface.json 也只列出这些任务
+    """
+    try:
+        bundles = compile_interface(
+            interface, working_dir / "assets", install_path / "bundle", tasks
+        )
+        if tasks:
+            interface["task"] = select_tasks(interface, tasks)["task"]
+    except ValueError as e:
+        print(e)
+        print("Failed to compile pipeline.")
+        print("pipeline 编译失败。")
+        sys.exit(1)
+
+    for profile in interface["resource"]:
+        digest = bundles[profile["name"]]
+        profile["path"].append(f"{{PROJECT_DIR}}/bundle/{digest}/")
+        print(f"Pipeline bundle compiled: {profile['name']} -> bundle/{digest}")
+
+
 def install_chores():
     shutil.copy2(
         working_dir / "README.md",
@@ -118,6 +172,13 @@ def install_tools():
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Install into ./install.")
+    parser.add_argument("version", nargs="?", default=version)
+    parser.add_argument("--task", action="append",
+                        help="only install this interface.json task, with a lean pipeline bundle (repeatable)")
+    args = parser.parse_args()
+    version, tasks = args.version, args.task
+
     install_deps()
     install_resource()
     install_chores()
@@ -0,0 +1,148 @@
+import io
+import sys
+import argparse
+
+from typing import Dict, List, NamedTuple, Optional
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, ImageChops
+
+
+PIXELS_CHANGED = "pixels changed after re-encoding, original kept"
+
+
+class Result(NamedTuple):
+    path: Path
+    before: int
+    after: int
+    # Sides of the template that are uniform padding or fully transparent: (left, top, right, bottom)
+    border: Optional[tuple] = None
+    error: Optional[str] = None
+
+
+def pixels(image: Image.Image) -> Image.Image:
+    """Decoded pixels as MaaFramework compares them, keeping alpha only where it is not opaque"""
+    rgba = image.convert("RGBA")
+    if rgba.getchannel("A").getextrema()[0] == 255:
+        return rgba.convert("RGB")
+    return rgba
+
+
+def same_pixels(a: Image.Image, b: Image.Image) -> bool:
+    a, b = pixels(a), pixels(b)
+    return a.mode == b.mode and a.size == b.size and ImageChops.difference(a, b).getbbox() is None
+
+
+def encode(image: Image.Image) -> bytes:
+    """Smallest lossless PNG of image, without ancillary chunks"""
+    candidates = [pixels(image)]
+    if candidates[0].mode == "RGB" and candidates[0].getcolors(256):
+        # Few colors fit a palette; kept only if verified exact below
+        candidates.append(
+            candidates[0].quantize(colors=256, method=Image.Quantize.FASTOCTREE, dither=Image.Dither.NONE)
+        )
+
+    best = None
+    for candidate in candidates:
+        buffer = io.BytesIO()
+        candidate.save(buffer, "PNG", optimize=True)
+        data = buffer.getvalue()
+        if not same_pixels(image, Image.open(io.BytesIO(data))):
+            continue
+        if best is None or len(data) < len(best):
+            best = data
+    return best
+
+
+def padded_border(image: Image.Image) -> Optional[tuple]:
+    """Width of the uniform or fully transparent margin on each side, None if there is none"""
+    image = image.convert("RGBA")
+    alpha = image.getchannel("A").getbbox()
+    background = Image.new("RGBA", image.size, image.getpixel((0, 0)))
+    uniform = ImageChops.difference(image, background).getbbox()
+
+    boxes = [box for box in (alpha, uniform) if box]
+    if not boxes:
+        return None
+    left, top, right, bottom = min(boxes, key=lambda b: (b[2] - b[0]) * (b[3] - b[1]))
+    border = (left, top, image.width - right, image.height - bottom)
+    return border if any(border) else None
+
+
+def optimize_file(path: Path) -> Result:
+    original = path.read_bytes()
+    try:
+        image = Image.open(io.BytesIO(original))
+        image.load()
+    except (OSError, SyntaxError):
+        return Result(path, len(original), len(original), error="not a readable image, copied as is")
+
+    border = padded_border(image)
+    data = encode(image)
+    if data is None:
+        return Result(path, len(original), len(original), border, "no lossless encoding found")
+    if len(data) >= len(original):
+        return Result(path, len(original), len(original), border)
+
+    path.write_bytes(data)
+    if not same_pixels(image, Image.open(path)):
+        path.write_bytes(original)
+        return Result(path, len(original), len(original), border, PIXELS_CHANGED)
+    return Result(path, len(original), len(data), border)
+
+
+def optimize(image_dir: Path, jobs: int = 0) -> List[Result]:
+    """Re-encode every PNG under image_dir in place, keeping the decoded pixels identical"""
+    files = sorted(Path(image_dir).rglob("*.png"))
+    with ProcessPoolExecutor(max_workers=jobs or None) as executor:
+        return list(executor.map(optimize_file, files, chunksize=8))
+
+
+def report(image_dir: Path, results: List[Result]) -> bool:
+    """Print per-directory savings; returns False if any template could not be kept identical"""
+    per_dir: Dict[str, List[int]] = {}
+    for r in results:
+        relative = r.path.relative_to(image_dir)
+        key = relative.parts[0] if len(relative.parts) > 1 else "."
+        sizes = per_dir.setdefault(key, [0, 0, 0])
+        sizes[0] += 1
+        sizes[1] += r.before
+        sizes[2] += r.after
+
+    before = sum(r.before for r in results)
+    after = sum(r.after for r in results)
+    print(f"{image_dir}: {len(results)} templates, {before / 1024:.0f} KB -> {after / 1024:.0f} KB "
+          f"(-{(1 - after / before) if before else 0:.1%})")
+    for key, (count, b, a) in sorted(per_dir.items(), key=lambda item: item[1][2] - item[1][1]):
+        print(f"  {key:<24} {count:>4} files  {b / 1024:>8.0f} KB -> {a / 1024:>8.0f} KB  (-{(1 - a / b) if b else 0:.1%})")
+
+    # The framework matches transparent pixels too, so borders are reported, not trimmed
+    padded = [r for r in results if r.border]
+    if padded:
+        print(f"  {len(padded)} templates have uniform or transparent borders (left, top, right, bottom):")
+        for r in padded:
+            print(f"    {r.path.relative_to(image_dir).as_posix()}  {r.border}")
+
+    for r in results:
+        if r.error:
+            print(f"  {r.path.relative_to(image_dir).as_posix()}: {r.error}")
+    return not any(r.error == PIXELS_CHANGED for r in results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Losslessly re-encode PNG templates in place.")
+    parser.add_argument("dirs", nargs="+", type=Path, help="image directories of resource bundles")
+    parser.add_argument("-j", "--jobs", type=int, default=0, help="worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    ok = True
+    for d in args.dirs:
+        ok = report(d, optimize(d, args.jobs)) and ok
+
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Make agent/action modules importable without Windows.
+
+The action package and its include module import win32 modules at import
+time. Tests get a stand-in "action" package over the same directory, whose
+include holds only the portable part and whose log functions do nothing, so
+a module like action.template_match is imported from its real source.
+"""
+
+import json
+import sys
+import types
+from pathlib import Path
+
+action_dir = Path(__file__).resolve().parents[1] / "agent" / "action"
+
+
+def _stub_action_package():
+    try:
+        import numpy as np
+        from PIL import Image
+        from maa.agent.agent_server import AgentServer
+        from maa.custom_action import CustomAction
+        from maa.context import Context
+    except ImportError:
+        # Tests that need them skip on their own
+        return
+
+    package = types.ModuleType("action")
+    package.__path__ = [str(action_dir)]
+
+    include = types.ModuleType("action.include")
+    include.__dict__.update(
+        sys=sys, json=json, np=np, Image=Image,
+        AgentServer=AgentServer, CustomAction=CustomAction, Context=Context,
+    )
+
+    log = types.ModuleType("action.log")
+    log.MaaLog_Debug = lambda message: None
+    log.MaaLog_Info = lambda message: None
+
+    package.include, package.log = include, log
+    sys.modules.update({"action": package, "action.include": include, "action.log": log})
+
+
+_stub_action_package()
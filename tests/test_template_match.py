@@ -0,0 +1,107 @@
+"""
+multi_template_match scoring
+
+action.template_match is imported through the stand-in package of conftest.py,
+so these run wherever maafw, numpy and Pillow are installed.
+"""
+
+import json
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+pytest.importorskip("maa")
+
+from PIL import Image
+from action import template_match
+
+
+def brute_force(image, template, mask):
+    h, w = template.shape
+    t = template[mask] - template[mask].mean()
+    scores = np.zeros((image.shape[0] - h + 1, image.shape[1] - w + 1))
+    for y in range(scores.shape[0]):
+        for x in range(scores.shape[1]):
+            window = image[y:y + h, x:x + w][mask]
+            window = window - window.mean()
+            denominator = np.sqrt((window ** 2).sum() * (t ** 2).sum())
+            scores[y, x] = (window * t).sum() / denominator if denominator else 0.0
+    return scores
+
+
+def analyze(frame, names, green_mask=True):
+    argv = SimpleNamespace(
+        node_name="test",
+        image=frame,
+        roi=SimpleNamespace(x=0, y=0, w=0, h=0),
+        custom_recognition_param=json.dumps({"template": names, "green_mask": green_mask}),
+    )
+    return template_match.MultiTemplateMatchRecognition().analyze(None, argv)
+
+
+@pytest.fixture
+def image_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(template_match, "image_dir", lambda bundle="resource": tmp_path)
+    monkeypatch.setattr(template_match, "_global_templates", template_match.TemplateSet())
+    return tmp_path
+
+
+def test_masked_scores_match_brute_force():
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 256, (30, 40)).astype(np.float64)
+    template = rng.integers(0, 256, (7, 9)).astype(np.float64)
+    mask = rng.random((7, 9)) > 0.3
+    scores = template_match.match_scores(image, template, mask)
+    assert np.abs(scores - brute_force(image, template, mask)).max() < 1e-6
+
+
+def test_flat_frame_never_matches():
+    rng = np.random.default_rng(1)
+    template = 100 + rng.normal(0, 2, (56, 56))
+    mask = rng.random((56, 56)) > 0.2
+    for value in (0, 37, 255):
+        scores = template_match.match_scores(np.full((180, 320), float(value)), template, mask)
+        assert not scores.any()
+
+
+def test_scores_stay_within_bounds_around_flat_areas():
+    rng = np.random.default_rng(2)
+    image = rng.integers(0, 256, (180, 320)).astype(np.float64)
+    image[40:140, 60:260] = 200
+    image[60:120, 100:200] += rng.normal(0, 0.01, (60, 100))
+    template = 100 + rng.normal(0, 2, (40, 40))
+    mask = rng.random((40, 40)) > 0.2
+    scores = template_match.match_scores(image, template, mask)
+    assert np.abs(scores).max() <= 1.0
+    assert not scores[60:80, 100:160].any()
+
+
+def test_blank_frame_misses(image_dir):
+    rng = np.random.default_rng(3)
+    texture = rng.integers(0, 256, (44, 50, 3), dtype=np.uint8)
+    texture[:4] = (0, 255, 0)
+    Image.fromarray(texture).save(image_dir / "textured.png")
+    flat = np.full((44, 50, 3), 120, dtype=np.uint8)
+    flat[10:12, 10:12] = 121
+    Image.fromarray(flat).save(image_dir / "flat.png")
+
+    for value in (0, 128):
+        result = analyze(np.full((720, 1280, 3), value, dtype=np.uint8), ["flat.png", "textured.png"])
+        assert result.box is None
+        assert max(json.loads(result.detail)["scores"]) == 0.0
+
+
+def test_pasted_template_is_found(image_dir):
+    rng = np.random.default_rng(4)
+    texture = rng.integers(0, 256, (44, 50, 3), dtype=np.uint8)
+    Image.fromarray(texture).save(image_dir / "textured.png")
+    Image.fromarray(np.full((44, 50, 3), 120, dtype=np.uint8)).save(image_dir / "flat.png")
+
+    frame = np.kron(rng.integers(0, 256, (72, 128, 3)), np.ones((10, 10, 1))).astype(np.uint8)
+    frame[300:400, 100:500] = 64
+    frame[333:377, 517:567] = texture[..., ::-1]
+
+    result = analyze(frame, ["flat.png", "textured.png"])
+    assert result.box == (517, 333, 50, 44)
+    assert json.loads(result.detail)["index"] == 1
@@ -1,9 +1,160 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 from PIL import Image, ImageTk
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
+import hashlib
+import itertools
+import json
 import os
+import queue
+import sys
+import tempfile
 import threading
 
+
+def output_path_for(image_path, suffix, output_dir=None):
+    """剪裁结果的保存路径：原文件名加后缀，默认与原图同目录"""
+    base_name = os.path.splitext(os.path.basename(image_path))[0]
+    return os.path.join(output_dir or os.path.dirname(image_path), f"{base_name}{suffix}.png")
+
+
+def crop_file(image_path, box, output_path, overwrite):
+    """剪裁单个文件，在工作进程中运行；返回 (文件名, 是否成功, 说明)"""
+    filename = os.path.basename(image_path)
+    try:
+        x, y, width, height = box
+        with Image.open(image_path) as image:
+            img_width, img_height = image.size
+
+            # 检查剪裁区域是否有效
+            if (x < 0 or y < 0 or width <= 0 or height <= 0 or
+                    x + width > img_width or y + height > img_height):
+                return filename, False, "剪裁参数超出图片范围或无效"
+
+            # 检查是否覆盖
+            if os.path.exists(output_path) and not overwrite:
+                return filename, False, "文件已存在"
+
+            cropped = image.crop((x, y, x + width, y + height))
+            cropped.save(output_path, "PNG")
+        return filename, True, output_path
+    except Exception as e:
+        return filename, False, str(e)
+
+
+def run_crop_jobs(jobs, results, cancel_event=None, workers=None):
+    """
+    用进程池并行剪裁，jobs 为 (图片路径, [x, y, w, h], 输出路径, 是否覆盖)。
+    每完成一个文件就把结果放入 results 队列，全部结束后放入 None。
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(crop_file, *job) for job in jobs]
+        for future in as_completed(futures):
+            results.put(future.result())
+            if cancel_event is not None and cancel_event.is_set():
+                for pending in futures:
+                    pending.cancel()
+                break
+    results.put(None)
+
+
+def load_manifest(manifest_path, suffix, output_dir, overwrite):
+    """
+    读取剪裁清单 {"图片路径": [x, y, w, h]}，图片路径相对于清单所在目录。
+    指定 output_dir 时保持相对目录结构输出。
+    """
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    jobs = []
+    for relative, box in manifest.items():
+        image_path = os.path.join(base_dir, relative)
+        target_dir = None
+        if output_dir:
+            target_dir = os.path.join(output_dir, os.path.dirname(relative))
+            os.makedirs(target_dir, exist_ok=True)
+        jobs.append((image_path, box, output_path_for(image_path, suffix, target_dir), overwrite))
+    return jobs
+
+
+def run_headless(args):
+    """无界面批量剪裁"""
+    jobs = load_manifest(args.manifest, args.suffix, args.output_dir, args.overwrite)
+    results = queue.Queue()
+    run_crop_jobs(jobs, results, workers=args.jobs or None)
+
+    success_count = 0
+    error_count = 0
+    while True:
+        result = results.get()
+        if result is None:
+            break
+        filename, ok, message = result
+        if ok:
+            success_count += 1
+        else:
+            error_count += 1
+            print(f"处理文件 {filename} 时出错: {message}")
+
+    print(f"成功: {success_count}, 失败: {error_count}")
+    return error_count == 0
+
+
+class ThumbnailCache:
+    """
+    磁盘缩略图缓存，以 路径 + 修改时间 + 预览尺寸 为键。
+    后台线程按优先级生成缩略图，当前选中的文件优先；完成的路径放入 done 队列。
+    """
+
+    def __init__(self, max_size, cache_dir=None):
+        self.max_size = max_size
+        self.cache_dir = cache_dir or os.path.join(tempfile.gettempdir(), "image_crop_thumbnails")
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self.requests = queue.PriorityQueue()
+        self.done = queue.Queue()
+        self.counter = itertools.count()
+        self.worker = threading.Thread(target=self._work, daemon=True)
+        self.worker.start()
+
+    def cache_path(self, image_path):
+        stat = os.stat(image_path)
+        key = f"{os.path.abspath(image_path)}|{stat.st_mtime_ns}|{stat.st_size}|{self.max_size}"
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".png")
+
+    def get(self, image_path):
+        """已缓存的缩略图，没有则返回 None"""
+        try:
+            path = self.cache_path(image_path)
+            if os.path.exists(path):
+                with Image.open(path) as thumbnail:
+                    thumbnail.load()
+                    return thumbnail.copy()
+        except OSError:
+            pass
+        return None
+
+    def request(self, image_path, urgent=False):
+        """请求后台生成缩略图；urgent 的请求排在前面"""
+        self.requests.put((0 if urgent else 1, next(self.counter), image_path))
+
+    def _work(self):
+        while True:
+            _, _, image_path = self.requests.get()
+            try:
+                path = self.cache_path(image_path)
+                if not os.path.exists(path):
+                    with Image.open(image_path) as image:
+                        image.draft("RGB", self.max_size)
+                        image.thumbnail(self.max_size, Image.Resampling.LANCZOS)
+                        image.save(path, "PNG")
+                self.done.put(image_path)
+            except Exception as e:
+                print(f"生成缩略图 {image_path} 时出错: {str(e)}")
+
+
 class ImageCropTool:
     def __init__(self, root):
         self.root = root
@@ -23,8 +174,10 @@ class ImageCropTool:
         self.canvas_width = 400
         self.canvas_height = 300
         self.scale_factor = 1.0
+        self.thumbnails = ThumbnailCache((self.canvas_width, self.canvas_height))
         
         self.setup_ui()
+        self.root.after(100, self.poll_thumbnails)
         
     def setup_ui(self):
         # 主框架
@@ -160,6 +313,10 @@ class ImageCropTool:
             
             self.image_files.sort()
             self.file_combo['values'] = self.image_files
+
+            # 后台预先生成整个目录的缩略图
+            for file in self.image_files:
+                self.thumbnails.request(os.path.join(self.current_directory, file))
             
             if self.image_files:
                 self.file_combo.set(self.image_files[0])
@@ -183,6 +340,7 @@ class ImageCropTool:
             if not os.path.exists(self.current_image_path):
                 return
                 
+            # Image.open 只读取文件头，剪裁时才解码像素
             self.original_image = Image.open(self.current_image_path)
             width, height = self.original_image.size
             
@@ -199,24 +357,36 @@ class ImageCropTool:
         except Exception as e:
             messagebox.showerror("错误", f"加载图片失败: {str(e)}")
     
+    def poll_thumbnails(self):
+        """在 Tk 线程中检查后台生成的缩略图，当前文件的缩略图就绪时刷新预览"""
+        while True:
+            try:
+                image_path = self.thumbnails.done.get_nowait()
+            except queue.Empty:
+                break
+            if image_path == self.current_image_path and self.original_image:
+                self.show_image_preview()
+        self.root.after(100, self.poll_thumbnails)
+
     def show_image_preview(self):
-        """显示图片预览"""
+        """显示图片预览，使用缓存的缩略图，原图只在剪裁时解码"""
         if not self.original_image:
             return
             
         try:
-            # 计算缩放比例以适应画布
+            thumbnail = self.thumbnails.get(self.current_image_path)
+            if thumbnail is None:
+                self.thumbnails.request(self.current_image_path, urgent=True)
+                self.canvas.delete("all")
+                self.canvas.create_text(
+                    self.canvas_width // 2, self.canvas_height // 2, text="正在生成预览...", fill="gray"
+                )
+                return
+
+            # 缩略图已按画布大小缩放
             img_width, img_height = self.original_image.size
-            scale_x = self.canvas_width / img_width
-            scale_y = self.canvas_height / img_height
-            self.scale_factor = min(scale_x, scale_y, 1.0)
-            
-            # 缩放图片
-            new_width = int(img_width * self.scale_factor)
-            new_height = int(img_height * self.scale_factor)
-            
-            resized_image = self.original_image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            self.preview_image = ImageTk.PhotoImage(resized_image)
+            self.scale_factor = thumbnail.width / img_width
+            self.preview_image = ImageTk.PhotoImage(thumbnail)
             
             # 清除画布并显示图片
             self.canvas.delete("all")
@@ -457,77 +627,80 @@ class ImageCropTool:
         status_label.pack(pady=5)
         
         # 取消按钮
-        cancel_var = tk.BooleanVar()
+        cancel_event = threading.Event()
         ttk.Button(progress_window, text="取消", 
-                  command=lambda: cancel_var.set(True)).pack(pady=10)
-        
-        def batch_process():
-            """批量处理函数"""
-            success_count = 0
-            error_count = 0
-            total_files = len(self.image_files)
-            suffix = self.suffix_var.get()
-            overwrite = self.overwrite_var.get()
-            
-            for i, filename in enumerate(self.image_files):
-                if cancel_var.get():
-                    break
-                    
+                  command=cancel_event.set).pack(pady=10)
+        
+        # 在后台线程中驱动进程池，结果经队列交回 Tk 线程
+        total_files = len(self.image_files)
+        suffix = self.suffix_var.get()
+        overwrite = self.overwrite_var.get()
+        jobs = []
+        for filename in self.image_files:
+            image_path = os.path.join(self.current_directory, filename)
+            jobs.append((image_path, (x, y, width, height), output_path_for(image_path, suffix), overwrite))
+
+        results = queue.Queue()
+        counts = {"done": 0, "success": 0, "error": 0}
+
+        thread = threading.Thread(target=run_crop_jobs, args=(jobs, results, cancel_event))
+        thread.daemon = True
+        thread.start()
+
+        def poll_results():
+            """在 Tk 线程中读取进度队列"""
+            finished = False
+            while True:
                 try:
-                    # 更新进度
-                    progress = (i / total_files) * 100
-                    progress_var.set(progress)
-                    progress_label.config(text=f"处理中... ({i+1}/{total_files})")
-                    status_label.config(text=f"正在处理: {filename}")
-                    progress_window.update()
-                    
-                    # 加载图片
-                    image_path = os.path.join(self.current_directory, filename)
-                    image = Image.open(image_path)
-                    img_width, img_height = image.size
-                    
-                    # 检查剪裁区域是否有效
-                    if (x < 0 or y < 0 or x + width > img_width or y + height > img_height):
-                        error_count += 1
-                        continue
-                    
-                    # 生成输出文件名
-                    base_name = os.path.splitext(filename)[0]
-                    output_filename = f"{base_name}{suffix}.png"
-                    output_path = os.path.join(self.current_directory, output_filename)
-                    
-                    # 检查是否覆盖
-                    if os.path.exists(output_path) and not overwrite:
-                        error_count += 1
-                        continue
-                    
-                    # 执行剪裁
-                    cropped = image.crop((x, y, x + width, y + height))
-                    cropped.save(output_path, "PNG")
-                    success_count += 1
-                    
-                except Exception as e:
-                    error_count += 1
-                    print(f"处理文件 {filename} 时出错: {str(e)}")
-            
+                    result = results.get_nowait()
+                except queue.Empty:
+                    break
+                if result is None:
+                    finished = True
+                    break
+
+                filename, ok, message = result
+                counts["done"] += 1
+                if ok:
+                    counts["success"] += 1
+                else:
+                    counts["error"] += 1
+                    print(f"处理文件 {filename} 时出错: {message}")
+                progress_var.set(counts["done"] / total_files * 100)
+                progress_label.config(text=f"处理中... ({counts['done']}/{total_files})")
+                status_label.config(text=f"已完成: {filename}")
+
+            if not finished:
+                progress_window.after(50, poll_results)
+                return
+
             # 完成
             progress_var.set(100)
-            if cancel_var.get():
+            if cancel_event.is_set():
                 progress_label.config(text="已取消")
-                status_label.config(text=f"成功: {success_count}, 失败: {error_count}")
             else:
                 progress_label.config(text="批量剪裁完成")
-                status_label.config(text=f"成功: {success_count}, 失败: {error_count}")
-            
+            status_label.config(text=f"成功: {counts['success']}, 失败: {counts['error']}")
+
             # 3秒后自动关闭
             progress_window.after(3000, progress_window.destroy)
-        
-        # 在新线程中执行批量处理
-        thread = threading.Thread(target=batch_process)
-        thread.daemon = True
-        thread.start()
+
+        progress_window.after(50, poll_results)
 
 def main():
+    parser = argparse.ArgumentParser(description="图片剪裁工具 - Image Crop Helper")
+    parser.add_argument("--manifest", help="剪裁清单 JSON，{\"图片路径\": [x, y, w, h]}；指定后不启动界面")
+    parser.add_argument("--output-dir", help="输出目录（默认与原图同目录）")
+    parser.add_argument("--suffix", default="_cropped", help="输出文件名后缀")
+    parser.add_argument("--overwrite", action="store_true", help="覆盖同名文件")
+    parser.add_argument("-j", "--jobs", type=int, default=0, help="工作进程数（默认 CPU 核数）")
+    args = parser.parse_args()
+
+    if args.manifest:
+        if not run_headless(args):
+            sys.exit(1)
+        return
+
     root = tk.Tk()
     app = ImageCropTool(root)
     root.mainloop()
@@ -0,0 +1,264 @@
+"""
+Benchmark the OCR model variants of MaaCommonAssets on our own OCR nodes.
+
+The corpus is built from run records that carry their frame
+(bench_recognition.py --records): every recorded OCR recognition becomes a
+labeled crop, the node's roi on that frame, labeled with whether the node's
+"expected" text was found. Review the records first, since the labels are
+the outcomes of the model that recorded them.
+
+Every variant under assets/MaaCommonAssets/OCR that has a rec.onnx is run
+on the corpus in a fresh process, both with detection and recognition and
+recognition-only ("only_rec": true, the whole roi read as one line), with
+the profile's default_pipeline.json and each node's own threshold and
+replace, so every crop is recognized as in production. The report lists
+accuracy against the labels, latency percentiles, the peak memory of the
+process and the model size on disk; configure.py --ocr-report
+installs the fastest variant that meets an accuracy threshold.
+
+Usage:
+    python tools/pipeline/bench_ocr_models.py example_img run.jsonl [--variant ppocr_v4/zh_cn]
+                                               [--json ocr_report.json]
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Dict, List, NamedTuple
+
+import argparse
+import json
+import multiprocessing
+import re
+import shutil
+import sys
+import tempfile
+import time
+
+from pipeline_graph import PipelineGraph, load_interface
+from compile_pipeline import assets_dir, find_profile, load_jsonc, resolve_profile_dirs
+from run_log import load_frames, read_records
+
+OCR_ASSETS_DIR = assets_dir / "MaaCommonAssets" / "OCR"
+
+READ_ENTRY = "OCRBench_Read"
+BENCH_ENTRY = "OCRBench_Run"
+BENCH_ACTION = "OCRBenchAction"
+
+# Node fields that change what an OCR recognition returns, kept on every crop
+RESULT_FIELDS = ("threshold", "replace")
+
+
+class Sample(NamedTuple):
+    frame: str
+    node: str
+    roi: List[int]
+    expected: list
+    hit: bool
+    fields: dict
+
+
+def find_variants(ocr_dir: Path = OCR_ASSETS_DIR) -> List[str]:
+    """Model dirs relative to the OCR assets, e.g. ppocr_v5/zh_cn"""
+    return sorted(p.parent.relative_to(ocr_dir).as_posix() for p in ocr_dir.rglob("rec.onnx"))
+
+
+def build_corpus(graph: PipelineGraph, paths: List[Path]) -> List[Sample]:
+    """One labeled crop per recorded OCR recognition, last record per node and frame wins"""
+    samples = {}
+    for record in read_records(paths):
+        node = graph.nodes.get(record.node)
+        if not record.frame or not node or node.get("recognition") != "OCR":
+            continue
+        roi = node.get("roi")
+        expected = node.get("expected", [])
+        if not isinstance(roi, list) or not expected:
+            continue
+        expected = [expected] if isinstance(expected, str) else expected
+        fields = {field: node[field] for field in RESULT_FIELDS if field in node}
+        samples[(record.node, record.frame)] = Sample(record.frame, record.node, roi, expected, record.hit, fields)
+    return list(samples.values())
+
+
+def default_pipeline(profile: dict, project_dir: Path = assets_dir) -> dict:
+    """default_pipeline.json of a profile's bundles merged in load order, as MaaFramework stacks them"""
+    merged = {}
+    for d in resolve_profile_dirs(profile, project_dir):
+        path = d / "default_pipeline.json"
+        if path.exists():
+            for key, value in load_jsonc(path).items():
+                merged[key] = {**merged.get(key, {}), **value}
+    return merged
+
+
+def peak_memory_mb() -> float:
+    """Peak resident memory of this process: peak working set on Windows, ru_maxrss elsewhere"""
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+                (name, ctypes.c_size_t) for name in (
+                    "PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage", "QuotaPagedPoolUsage",
+                    "QuotaPeakNonPagedPoolUsage", "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage",
+                )
+            ]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb)
+        return counters.PeakWorkingSetSize / 1024 / 1024
+
+    import resource
+    # ru_maxrss is in bytes on macOS and in KB elsewhere
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def bench_variant(variant: str, only_rec: bool, samples: List[Sample], frames_dir: Path, defaults: dict) -> dict:
+    """Run one model variant over the corpus with the given default_pipeline; meant to run in its own process"""
+    from maa.custom_action import CustomAction
+    from maa.resource import Resource
+    from maa.tasker import LoggingLevelEnum, Tasker
+
+    from bench_recognition import FrameController
+
+    frames = load_frames(frames_dir)
+    timings = []
+    failures = []
+
+    class OCRBenchAction(CustomAction):
+        def run(self, context, argv):
+            # The first recognition loads the model, keep it out of the timings
+            first = samples[0]
+            context.run_recognition(READ_ENTRY, frames[first.frame], {READ_ENTRY: {"roi": first.roi}})
+
+            for sample in samples:
+                override = {READ_ENTRY: {
+                    **sample.fields, "roi": sample.roi, "expected": sample.expected, "only_rec": only_rec,
+                }}
+                start = time.perf_counter()
+                detail = context.run_recognition(READ_ENTRY, frames[sample.frame], override)
+                timings.append((time.perf_counter() - start) * 1000)
+
+                # Bindings before 5.x have no "hit" and leave the box empty on a miss
+                hit = detail is not None and getattr(detail, "hit", detail.box is not None)
+                if hit != sample.hit:
+                    failures.append({"node": sample.node, "frame": sample.frame, "expected_hit": sample.hit})
+            return CustomAction.RunResult(success=True)
+
+    Tasker.set_stdout_level(LoggingLevelEnum.Off)
+    with tempfile.TemporaryDirectory() as bundle:
+        bundle = Path(bundle)
+        shutil.copytree(OCR_ASSETS_DIR / variant, bundle / "model" / "ocr")
+        (bundle / "pipeline").mkdir()
+        with open(bundle / "default_pipeline.json", "w", encoding="utf-8") as f:
+            json.dump(defaults, f, ensure_ascii=False)
+        with open(bundle / "pipeline" / "ocr_bench.json", "w", encoding="utf-8") as f:
+            json.dump({READ_ENTRY: {"recognition": "OCR"}, BENCH_ENTRY: {}}, f)
+
+        resource = Resource()
+        if not resource.post_bundle(bundle).wait().succeeded:
+            return {"model": variant, "only_rec": only_rec, "error": "failed to load the model"}
+        action = OCRBenchAction()
+        resource.register_custom_action(BENCH_ACTION, action)
+
+        controller = FrameController()
+        controller.post_connection().wait()
+        tasker = Tasker()
+        tasker.bind(resource, controller)
+        override = {BENCH_ENTRY: {"action": "Custom", "custom_action": BENCH_ACTION}}
+        if not tasker.post_task(BENCH_ENTRY, override).wait().succeeded:
+            return {"model": variant, "only_rec": only_rec, "error": "benchmark task failed"}
+
+    size = sum(p.stat().st_size for p in (OCR_ASSETS_DIR / variant).rglob("*") if p.is_file())
+    return {
+        "model": variant,
+        "only_rec": only_rec,
+        "samples": len(samples),
+        "accuracy": round(1 - len(failures) / len(samples), 4),
+        "p50_ms": round(percentile(timings, 0.5), 3),
+        "p90_ms": round(percentile(timings, 0.9), 3),
+        "p99_ms": round(percentile(timings, 0.99), 3),
+        "peak_mb": round(peak_memory_mb(), 1),
+        "size_mb": round(size / 1024 / 1024, 1),
+        "failures": failures,
+    }
+
+
+def run_isolated(variant: str, only_rec: bool, samples: List[Sample], frames_dir: Path, defaults: dict) -> dict:
+    """bench_variant in a fresh process, so peak memory belongs to one model only"""
+    try:
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+            return executor.submit(bench_variant, variant, only_rec, samples, frames_dir, defaults).result()
+    except BrokenProcessPool:
+        # A model the runtime cannot load may take the whole process down
+        return {"model": variant, "only_rec": only_rec, "error": "benchmark process crashed"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark OCR model variants on recorded OCR nodes.")
+    parser.add_argument("frames", type=Path, help="directory of the recorded 16:9 frames")
+    parser.add_argument("records", nargs="+", type=Path, help="run records (*.jsonl) with a frame per recognition")
+    parser.add_argument("--resource", help="resource profile name from interface.json (default: first)")
+    parser.add_argument("--node", help="only use nodes whose name matches this regex")
+    parser.add_argument("--variant", action="append", help="model dir under MaaCommonAssets/OCR (default: all)")
+    parser.add_argument("--json", type=Path, help="write the report for configure.py --ocr-report")
+    args = parser.parse_args()
+
+    variants = args.variant or find_variants()
+    if not variants:
+        print(f"No OCR models found under {OCR_ASSETS_DIR}, is the MaaCommonAssets submodule checked out?")
+        sys.exit(1)
+
+    interface = load_interface()
+    graph = PipelineGraph.from_profile(args.resource, interface)
+    defaults = default_pipeline(find_profile(interface, args.resource))
+    samples = build_corpus(graph, args.records)
+    if args.node:
+        samples = [s for s in samples if re.search(args.node, s.node)]
+    frame_names = set(load_frames(args.frames))
+    samples = [s for s in samples if s.frame in frame_names]
+    if not samples:
+        print("No recorded OCR recognitions match the frames.")
+        sys.exit(1)
+
+    hits = sum(s.hit for s in samples)
+    print(f"{len(samples)} labeled crops ({hits} hits, {len(samples) - hits} misses) "
+          f"from {len({s.node for s in samples})} OCR nodes\n")
+
+    results: List[Dict] = []
+    for variant in variants:
+        for only_rec in (False, True):
+            result = run_isolated(variant, only_rec, samples, args.frames, defaults)
+            results.append(result)
+            mode = "rec only" if only_rec else "det+rec"
+            if "error" in result:
+                print(f"  {variant:<20} {mode:<9} {result['error']}")
+                continue
+            print(f"  {variant:<20} {mode:<9} accuracy {result['accuracy']:7.2%}  "
+                  f"p50 {result['p50_ms']:7.2f}  p90 {result['p90_ms']:7.2f} ms  "
+                  f"peak {result['peak_mb']:7.1f} MB  size {result['size_mb']:5.1f} MB")
+
+    # Nodes that rec-only reads correctly on every crop could set "only_rec": true
+    for result in results:
+        if result.get("only_rec") and "error" not in result:
+            failed = {f["node"] for f in result["failures"]}
+            result["only_rec_nodes"] = sorted({s.node for s in samples} - failed)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"samples": len(samples), "variants": results}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
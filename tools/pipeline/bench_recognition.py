@@ -0,0 +1,243 @@
+"""
+Benchmark pipeline recognitions offline over recorded frames.
+
+Loads the bundles of a resource profile into MaaFramework, binds a custom
+controller that never touches a device, and runs the recognition of every
+selected OCR/TemplateMatch/ColorMatch node against every frame through
+Context.run_recognition, without executing actions. The binding must be one
+that still loads this pipeline ("interrupt" was removed in MaaFramework 5.1).
+Reports hit counts and per-node latency percentiles, and can save the hits
+as run records for roi_tighten.py and reorder_next.py.
+
+Frames must be 16:9 screenshots; they are scaled to 1280x720 like the
+framework scales live screencaps.
+
+Usage:
+    python tools/pipeline/bench_recognition.py example_img [--node 134.*] [--recognition OCR]
+                                               [--repeat 3] [--records run.jsonl] [--json out.json]
+"""
+
+from pathlib import Path
+from typing import Dict, List
+
+import argparse
+import json
+import re
+import sys
+import time
+
+import numpy
+
+from maa.context import Context
+from maa.controller import CustomController
+from maa.custom_action import CustomAction
+from maa.resource import Resource
+from maa.tasker import LoggingLevelEnum, Tasker
+
+from pipeline_graph import PipelineGraph, load_interface
+from compile_pipeline import assets_dir, find_profile, resolve_profile_dirs
+from run_log import FRAME_SIZE, RecognitionRecord, load_frames, write_records
+
+BENCHMARKED_RECOGNITIONS = ("OCR", "TemplateMatch", "ColorMatch")
+
+BENCH_ENTRY = "Bench_RunRecognitions"
+BENCH_ACTION = "BenchRecognitions"
+
+
+class FrameController(CustomController):
+    """Controller without a device; frames are handed to recognitions directly"""
+
+    def __init__(self):
+        super().__init__()
+        self.blank = numpy.zeros((FRAME_SIZE[1], FRAME_SIZE[0], 3), dtype=numpy.uint8)
+
+    def connect(self) -> bool:
+        return True
+
+    def request_uuid(self) -> str:
+        return "bench_recognition"
+
+    def start_app(self, intent: str) -> bool:
+        return True
+
+    def stop_app(self, intent: str) -> bool:
+        return True
+
+    def screencap(self) -> numpy.ndarray:
+        return self.blank
+
+    def click(self, x: int, y: int) -> bool:
+        return True
+
+    def swipe(self, x1: int, y1: int, x2: int, y2: int, duration: int) -> bool:
+        return True
+
+    def touch_down(self, contact: int, x: int, y: int, pressure: int) -> bool:
+        return True
+
+    def touch_move(self, contact: int, x: int, y: int, pressure: int) -> bool:
+        return True
+
+    def touch_up(self, contact: int) -> bool:
+        return True
+
+    def click_key(self, keycode: int) -> bool:
+        return True
+
+    def input_text(self, text: str) -> bool:
+        return True
+
+    def key_down(self, keycode: int) -> bool:
+        return True
+
+    def key_up(self, keycode: int) -> bool:
+        return True
+
+    def scroll(self, dx: int, dy: int) -> bool:
+        return True
+
+
+class BenchAction(CustomAction):
+    """Runs the recognition of every node on every frame from inside a task"""
+
+    def __init__(self, nodes: List[str], frames: Dict[str, numpy.ndarray], repeat: int):
+        super().__init__()
+        self.nodes = nodes
+        self.frames = frames
+        self.repeat = repeat
+        self.timings: Dict[str, List[float]] = {name: [] for name in nodes}
+        self.records: List[RecognitionRecord] = []
+        self.hits: Dict[str, List[str]] = {name: [] for name in nodes}
+
+    def run(self, context: Context, argv: CustomAction.RunArg) -> CustomAction.RunResult:
+        for frame_name, frame in self.frames.items():
+            for name in self.nodes:
+                detail = None
+                for _ in range(self.repeat):
+                    start = time.perf_counter()
+                    detail = context.run_recognition(name, frame)
+                    self.timings[name].append((time.perf_counter() - start) * 1000)
+
+                # Bindings before 5.x have no "hit" and leave the box empty on a miss
+                hit = detail is not None and getattr(detail, "hit", detail.box is not None)
+                box = list(detail.box) if hit and detail.box else None
+                cost = sum(self.timings[name][-self.repeat:]) / self.repeat
+                self.records.append(RecognitionRecord(name, hit, box, round(cost, 3), frame_name))
+                if hit:
+                    self.hits[name].append(frame_name)
+        return CustomAction.RunResult(success=True)
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def select_nodes(graph: PipelineGraph, pattern: str, recognitions: List[str]) -> List[str]:
+    regex = re.compile(pattern) if pattern else None
+    return sorted(
+        name for name, node in graph.nodes.items()
+        if node.get("recognition") in recognitions and (regex is None or regex.search(name))
+    )
+
+
+def run_bench(profile: dict, action: BenchAction) -> bool:
+    resource = Resource()
+    for d in resolve_profile_dirs(profile, assets_dir):
+        if not resource.post_bundle(d).wait().succeeded:
+            print(f"Failed to load bundle {d}.")
+            return False
+    resource.register_custom_action(BENCH_ACTION, action)
+
+    controller = FrameController()
+    controller.post_connection().wait()
+
+    tasker = Tasker()
+    if not tasker.bind(resource, controller) or not tasker.inited:
+        print("Failed to initialize the tasker.")
+        return False
+
+    override = {BENCH_ENTRY: {"action": "Custom", "custom_action": BENCH_ACTION}}
+    return tasker.post_task(BENCH_ENTRY, override).wait().succeeded
+
+
+def build_report(graph: PipelineGraph, action: BenchAction) -> List[dict]:
+    rows = []
+    for name in action.nodes:
+        timings = action.timings[name]
+        rows.append({
+            "node": name,
+            "recognition": graph.nodes[name].get("recognition"),
+            "runs": len(timings),
+            "hits": len(action.hits[name]),
+            "hit_frames": action.hits[name],
+            "p50_ms": round(percentile(timings, 0.5), 3),
+            "p90_ms": round(percentile(timings, 0.9), 3),
+            "p99_ms": round(percentile(timings, 0.99), 3),
+            "total_ms": round(sum(timings), 3),
+        })
+    return sorted(rows, key=lambda r: -r["p50_ms"])
+
+
+def print_report(rows: List[dict], frames: int, top: int):
+    per_type = {}
+    for r in rows:
+        totals = per_type.setdefault(r["recognition"], [0, 0.0])
+        totals[0] += 1
+        totals[1] += r["total_ms"]
+
+    print(f"{len(rows)} nodes x {frames} frames")
+    for reco, (count, total) in sorted(per_type.items()):
+        runs = sum(r["runs"] for r in rows if r["recognition"] == reco)
+        print(f"  {reco:<14} {count:>5} nodes  {total / max(runs, 1):8.2f} ms mean")
+
+    print(f"\nSlowest nodes (p50 / p90 / p99 ms, hits):")
+    for r in rows[:top]:
+        print(f"  {r['p50_ms']:8.2f} {r['p90_ms']:8.2f} {r['p99_ms']:8.2f}  {r['hits']:>4}/{frames}  "
+              f"{r['recognition']:<13} {r['node']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pipeline recognitions over recorded frames.")
+    parser.add_argument("frames", type=Path, help="directory of 16:9 screenshots")
+    parser.add_argument("--resource", help="resource profile name from interface.json (default: first)")
+    parser.add_argument("--node", help="only benchmark nodes whose name matches this regex")
+    parser.add_argument("--recognition", action="append", choices=BENCHMARKED_RECOGNITIONS,
+                        help="only benchmark this recognition type (default: all three)")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per node and frame")
+    parser.add_argument("--top", type=int, default=30, help="nodes to list")
+    parser.add_argument("--records", type=Path, help="write one run record per node and frame (*.jsonl)")
+    parser.add_argument("--json", type=Path, help="also write the full report as JSON")
+    args = parser.parse_args()
+
+    Tasker.set_stdout_level(LoggingLevelEnum.Off)
+
+    interface = load_interface()
+    profile = find_profile(interface, args.resource)
+    graph = PipelineGraph.from_profile(args.resource, interface)
+
+    nodes = select_nodes(graph, args.node, args.recognition or list(BENCHMARKED_RECOGNITIONS))
+    frames = load_frames(args.frames)
+    if not nodes or not frames:
+        print(f"Nothing to benchmark: {len(nodes)} nodes, {len(frames)} frames.")
+        sys.exit(1)
+
+    action = BenchAction(nodes, frames, max(args.repeat, 1))
+    if not run_bench(profile, action):
+        print("Benchmark task failed.")
+        sys.exit(1)
+
+    rows = build_report(graph, action)
+    print_report(rows, len(frames), args.top)
+
+    if args.records:
+        write_records(args.records, action.records)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
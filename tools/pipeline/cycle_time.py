@@ -0,0 +1,210 @@
+"""
+Estimate the minimum cycle time of looping tasks from their fixed delays.
+
+For each task, the "next" graph reachable from its entry (with the selected
+option cases applied) is split into strongly connected components. In the
+largest loop, the main path is the cheapest cycle through the node that is
+hardest to loop back to, i.e. a full iteration rather than a retry.
+Its cost is the sum of pre_delay, post_delay and action duration of every
+node on it, assuming every recognition hits on its first try.
+
+Usage:
+    python tools/pipeline/cycle_time.py [--task 13-4循环] [--option 134_路线选择=...] [--top 15]
+"""
+
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+
+import argparse
+import heapq
+import sys
+
+from pipeline_graph import PipelineGraph, find_task, load_interface, selected_overrides
+
+# Actions whose "duration" blocks the pipeline
+TIMED_ACTIONS = ("LongPress", "Swipe", "MultiSwipe")
+
+
+def node_cost(graph: PipelineGraph, name: str) -> Dict[str, int]:
+    """Fixed waits of a node in ms, split by source"""
+    cost = {
+        "pre_delay": int(graph.value(name, "pre_delay") or 0),
+        "post_delay": int(graph.value(name, "post_delay") or 0),
+        "duration": 0,
+    }
+    if graph.nodes[name].get("action") in TIMED_ACTIONS:
+        cost["duration"] = int(graph.nodes[name].get("duration") or 0)
+    return cost
+
+
+def strongly_connected(graph: PipelineGraph, names: Set[str]) -> List[Set[str]]:
+    """Tarjan's algorithm over "next" edges, iterative to survive long chains"""
+    index = {}
+    low = {}
+    on_stack = set()
+    stack = []
+    components = []
+    counter = 0
+
+    for root in sorted(names):
+        if root in index:
+            continue
+        work = [(root, iter(graph.successors(root, ("next",))))]
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+
+        while work:
+            name, children = work[-1]
+            advanced = False
+            for child in children:
+                if child not in names:
+                    continue
+                if child not in index:
+                    index[child] = low[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(graph.successors(child, ("next",)))))
+                    advanced = True
+                    break
+                if child in on_stack:
+                    low[name] = min(low[name], index[child])
+            if advanced:
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[name])
+            if low[name] == index[name]:
+                component = set()
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.add(member)
+                    if member == name:
+                        break
+                components.append(component)
+
+    return components
+
+
+def cheapest_cycle(graph: PipelineGraph, component: Set[str], start: str,
+                   costs: Dict[str, int]) -> Tuple[int, List[str]]:
+    """Cheapest cycle through start inside a component, ignoring self-retries"""
+    dist = {start: costs[start]}
+    prev = {}
+    heap = [(costs[start], start)]
+    best = None
+
+    while heap:
+        d, name = heapq.heappop(heap)
+        if d > dist.get(name, float("inf")):
+            continue
+        if best is not None and d >= best[0]:
+            break
+        for child in graph.successors(name, ("next",)):
+            if child == name or child not in component:
+                continue
+            if child == start:
+                if best is None or d < best[0]:
+                    best = (d, name)
+                continue
+            nd = d + costs[child]
+            if nd < dist.get(child, float("inf")):
+                dist[child] = nd
+                prev[child] = name
+                heapq.heappush(heap, (nd, child))
+
+    if best is None:
+        return 0, []
+
+    path = [best[1]]
+    while path[-1] != start:
+        path.append(prev[path[-1]])
+    return best[0], path[::-1]
+
+
+def main_loop(graph: PipelineGraph, entry: str) -> Tuple[int, List[str]]:
+    reachable = graph.reachable([entry], ("next",))
+    components = [c for c in strongly_connected(graph, reachable) if len(c) > 1]
+    if not components:
+        return 0, []
+
+    component = max(components, key=len)
+    costs = {name: sum(node_cost(graph, name).values()) for name in component}
+
+    # The node whose cheapest cycle is the longest only comes back on a full iteration
+    cycles = [cheapest_cycle(graph, component, name, costs) for name in sorted(component)]
+    return max(cycles, key=lambda c: (c[0], len(c[1])))
+
+
+def print_task(graph: PipelineGraph, task: dict, top: int):
+    total, path = main_loop(graph, task["entry"])
+    if not path:
+        print(f"{task['name']}: no loop reachable from {task['entry']}\n")
+        return
+
+    breakdown = {name: node_cost(graph, name) for name in path}
+    per_field = {field: sum(c[field] for c in breakdown.values()) for field in ("pre_delay", "post_delay", "duration")}
+    per_hour = 3600 * 1000 / total if total else float("inf")
+
+    print(f"{task['name']} ({task['entry']}): {len(path)} nodes, minimum cycle {total / 1000:.1f} s, "
+          f"at most {per_hour:.0f} loops/h")
+    print(f"  pre_delay {per_field['pre_delay']} ms, post_delay {per_field['post_delay']} ms, "
+          f"duration {per_field['duration']} ms")
+
+    ranked = sorted(path, key=lambda name: -sum(breakdown[name].values()))
+    for name in ranked[:top]:
+        cost = breakdown[name]
+        ms = sum(cost.values())
+        share = 100 * ms / total if total else 0
+        print(f"  {ms:>6} ms {share:5.1f}%  {name}  "
+              f"(pre {cost['pre_delay']}, post {cost['post_delay']}, duration {cost['duration']})")
+    print()
+
+
+def parse_choices(items: List[str], interface: dict) -> Dict[str, str]:
+    """OPTION=CASE arguments as option name -> case name, checked against interface.json"""
+    options = interface.get("option", {})
+    choices = {}
+    for item in items:
+        name, _, case = item.partition("=")
+        if name not in options:
+            raise ValueError(f"Option \"{name}\" not found in interface.json, valid options: {', '.join(options)}")
+        cases = [c.get("name") for c in options[name].get("cases", [])]
+        if case not in cases:
+            raise ValueError(f"Option \"{name}\" has no case \"{case}\", valid cases: {', '.join(cases)}")
+        choices[name] = case
+    return choices
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Estimate loop cycle time from fixed pipeline delays.")
+    parser.add_argument("--resource", help="resource profile name from interface.json (default: first)")
+    parser.add_argument("--task", action="append", help="task name from interface.json (default: all)")
+    parser.add_argument("--option", action="append", default=[], metavar="OPTION=CASE",
+                        help="option case to apply (default: first case of every option)")
+    parser.add_argument("--top", type=int, default=10, help="nodes to list per task")
+    args = parser.parse_args()
+
+    interface = load_interface()
+    graph = PipelineGraph.from_profile(args.resource, interface)
+
+    try:
+        choices = parse_choices(args.option, interface)
+        tasks = [find_task(interface, name) for name in args.task] if args.task else interface["task"]
+        overrides_per_task = [selected_overrides(interface, task, choices) for task in tasks]
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+
+    for task, overrides in zip(tasks, overrides_per_task):
+        task_graph = graph.with_overrides(overrides, union_edges=False)
+        print_task(task_graph, task, args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Find nodes that are duplicated under different names and optionally merge them.
+
+Two nodes are duplicates when their bodies match once node names are
+ignored, and their successors (next/interrupt/on_error, node-name roi and
+target) are duplicates of each other in the same order. This is computed
+by partition refinement, so whole duplicated subgraphs (including their
+self-retries) collapse into the same classes.
+
+With --write, a refactored copy of assets/ is emitted: every duplicate
+class in scope becomes one shared node in tasks/public/rescue/公共打捞.json,
+and all references, in the base bundle, in overlay bundles (resource_en)
+and in interface.json option overrides, point to it. Nodes named by a task
+entry or an option override, or overridden by an overlay bundle, are never
+merged, since an override on a shared node would leak into every task using it.
+
+Usage:
+    python tools/pipeline/dedup_nodes.py [--scope tasks/Rescue/Doll] [--ignore roi --ignore target]
+                                         [--write out_dir]
+"""
+
+from pathlib import Path
+from typing import Dict, List
+
+import argparse
+import hashlib
+import json
+import sys
+
+from pipeline_graph import PipelineGraph, load_interface
+from compile_pipeline import (
+    EDGE_FIELDS, REFERENCE_FIELDS, assets_dir, load_pipeline, node_references, resolve_profile_dirs, task_overrides
+)
+
+# Fields that document a node without changing its behaviour
+IGNORED_FIELDS = ("doc",)
+
+SHARED_FILE = Path("tasks") / "public" / "rescue" / "公共打捞.json"
+SHARED_PREFIX = "public打捞_"
+
+
+def _digest(value) -> str:
+    text = json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def body_without_names(node: dict, ignored=()) -> dict:
+    """Node body with every field that names another node removed"""
+    body = {}
+    for field, value in node.items():
+        if field in EDGE_FIELDS or field in IGNORED_FIELDS or field in ignored:
+            continue
+        if field in REFERENCE_FIELDS and isinstance(value, str):
+            continue
+        body[field] = value
+    return body
+
+
+def references_by_field(node: dict) -> List[List[str]]:
+    return [node_references(node, (field,)) for field in EDGE_FIELDS + REFERENCE_FIELDS]
+
+
+def equivalence_classes(nodes: Dict[str, dict], ignored=()) -> Dict[str, str]:
+    """Node name -> class id; nodes sharing an id are interchangeable apart from ignored fields"""
+    classes = {name: _digest(body_without_names(node, ignored)) for name, node in nodes.items()}
+    count = len(set(classes.values()))
+
+    while True:
+        refined = {}
+        for name, node in nodes.items():
+            successors = [[classes.get(t, t) for t in refs] for refs in references_by_field(node)]
+            refined[name] = _digest([classes[name], successors])
+
+        refined_count = len(set(refined.values()))
+        classes = refined
+        if refined_count == count:
+            return classes
+        count = refined_count
+
+
+def find_duplicates(graph: PipelineGraph, scope: str, pinned: set, ignored=()) -> List[List[str]]:
+    """Groups of interchangeable nodes defined under scope, largest first"""
+    scope_dir = (assets_dir / "resource" / "pipeline" / scope).resolve()
+    classes = equivalence_classes(graph.nodes, ignored)
+
+    groups = {}
+    for name, cls in classes.items():
+        source = graph.sources.get(name)
+        if source is None or scope_dir not in Path(source).resolve().parents or name in pinned:
+            continue
+        groups.setdefault(cls, []).append(name)
+
+    duplicates = [sorted(members) for members in groups.values() if len(members) > 1]
+    return sorted(duplicates, key=lambda g: (-len(g), g[0]))
+
+
+def overlay_bundles(interface: dict) -> List[Path]:
+    """Bundle dirs any resource profile loads on top of the base resource bundle"""
+    base = (assets_dir / "resource").resolve()
+    overlays = []
+    for profile in interface.get("resource", []):
+        for dir in resolve_profile_dirs(profile, assets_dir):
+            if dir.resolve() != base and dir not in overlays:
+                overlays.append(dir)
+    return overlays
+
+
+def pinned_nodes(interface: dict) -> set:
+    """Nodes a task starts from, an option overrides or an overlay bundle overrides, which must keep their own identity"""
+    pinned = {task["entry"] for task in interface.get("task", [])}
+    for task in interface.get("task", []):
+        for override in task_overrides(interface, task):
+            pinned.update(override)
+    for bundle in overlay_bundles(interface):
+        nodes, _ = load_pipeline(bundle)
+        pinned.update(nodes)
+    return pinned
+
+
+def rename_references(node: dict, renames: Dict[str, str]) -> dict:
+    node = dict(node)
+    for field in EDGE_FIELDS:
+        if field in node:
+            targets = [node[field]] if isinstance(node[field], str) else node[field]
+            renamed = []
+            for target in targets:
+                target = renames.get(target, target)
+                if target not in renamed:
+                    renamed.append(target)
+            node[field] = renamed
+    for field in REFERENCE_FIELDS:
+        if isinstance(node.get(field), str):
+            node[field] = renames.get(node[field], node[field])
+    return node
+
+
+def write_pipeline(files: Dict[Path, Dict[str, dict]], pipeline_dir: Path):
+    for relative, nodes in files.items():
+        path = pipeline_dir / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(nodes, f, ensure_ascii=False, indent=4)
+
+
+def write_refactored(graph: PipelineGraph, interface: dict, duplicates: List[List[str]], output_dir: Path):
+    """Write the refactored bundles and interface.json to output_dir, laid out like assets/"""
+    pipeline_root = assets_dir / "resource" / "pipeline"
+    renames = {}
+    for members in duplicates:
+        shared = SHARED_PREFIX + members[0]
+        for name in members:
+            renames[name] = shared
+
+    files = {}
+    for name, node in graph.nodes.items():
+        relative = Path(graph.sources[name]).relative_to(pipeline_root)
+        if name in renames:
+            relative = SHARED_FILE
+            name = renames[name]
+            if name in files.get(relative, {}):
+                continue
+        files.setdefault(relative, {})[name] = rename_references(node, renames)
+    write_pipeline(files, output_dir / "resource" / "pipeline")
+
+    # Overlays never override a merged node, but their nodes may still reference one
+    for bundle in overlay_bundles(interface):
+        nodes, sources = load_pipeline(bundle)
+        files = {}
+        for name, node in nodes.items():
+            relative = Path(sources[name]).relative_to(bundle / "pipeline")
+            files.setdefault(relative, {})[name] = rename_references(node, renames)
+        write_pipeline(files, output_dir / bundle.relative_to(assets_dir) / "pipeline")
+
+    interface = json.loads(json.dumps(interface))
+    for option in interface.get("option", {}).values():
+        for case in option.get("cases", []):
+            override = case.get("pipeline_override", {})
+            for name in override:
+                override[name] = rename_references(override[name], renames)
+    with open(output_dir / "interface.json", "w", encoding="utf-8") as f:
+        json.dump(interface, f, ensure_ascii=False, indent=4)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find and merge duplicated pipeline nodes.")
+    parser.add_argument("--scope", default="tasks/Rescue/Doll",
+                        help="pipeline subdirectory whose nodes may be merged")
+    parser.add_argument("--ignore", action="append", default=[], metavar="FIELD",
+                        help="also group nodes that only differ in this field, e.g. roi (report only)")
+    parser.add_argument("--write", type=Path, help="emit the refactored bundles and interface.json here")
+    args = parser.parse_args()
+
+    if args.write and args.ignore:
+        print("--write cannot merge nodes that differ in --ignore fields.")
+        sys.exit(1)
+
+    interface = load_interface()
+    graph = PipelineGraph.from_profile(None, interface)
+    duplicates = find_duplicates(graph, args.scope, pinned_nodes(interface), args.ignore)
+
+    saved = sum(len(g) - 1 for g in duplicates)
+    saved_bytes = sum(
+        len(json.dumps(graph.nodes[name], ensure_ascii=False)) for g in duplicates for name in g[1:]
+    )
+    print(f"{len(duplicates)} duplicate groups in {args.scope}, "
+          f"{saved} redundant nodes (~{saved_bytes / 1024:.1f} KB)")
+
+    for members in duplicates:
+        files = sorted({Path(graph.sources[n]).name for n in members})
+        print(f"\n  {len(members)} x  ({', '.join(files)})")
+        for name in members:
+            print(f"    {name}")
+
+    if args.write:
+        write_refactored(graph, interface, duplicates, args.write)
+        print(f"\nRefactored pipeline written to {args.write}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Find duplicated template images and point their references to one file.
+
+Every PNG under the image dirs of all bundles gets a pixel digest and a
+64-bit difference hash (dHash). Templates with identical pixels are exact
+duplicates: with --write, every "template" reference in the pipeline and
+in interface.json overrides, including those inside custom_recognition_param,
+is rewritten to one canonical file and the other copies are deleted.
+
+Templates whose dHash differs in at most --distance bits are only reported.
+They are often variants on purpose (G-prefixed green-masked crops, digits
+like 计划点数-5 and 计划点数-8), and merging them would change what matches.
+A path that also exists in another bundle is a localized override and is
+never merged.
+
+Usage:
+    python tools/pipeline/dedup_templates.py [--distance 4] [--write]
+"""
+
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import argparse
+import hashlib
+import json
+import posixpath
+
+from PIL import Image
+
+from pipeline_graph import load_interface, node_templates, root_dir
+from compile_pipeline import assets_dir, load_pipeline
+
+BUNDLES = ("resource", "resource_en")
+
+
+def dhash(image: Image.Image) -> int:
+    """Difference hash: one bit per horizontally adjacent pixel pair of a 9x8 thumbnail"""
+    small = image.convert("L").resize((9, 8), Image.Resampling.LANCZOS)
+    pixels = small.tobytes()
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            if pixels[row * 9 + col] > pixels[row * 9 + col + 1]:
+                bits |= 1 << (row * 8 + col)
+    return bits
+
+
+def scan_templates(bundles=BUNDLES) -> Dict[Path, Tuple[str, int]]:
+    """Image file -> (pixel digest, dHash) for every readable PNG of the bundles"""
+    result = {}
+    for bundle in bundles:
+        for path in sorted((assets_dir / bundle / "image").rglob("*.png")):
+            try:
+                image = Image.open(path).convert("RGB")
+            except (OSError, SyntaxError):
+                continue
+            digest = hashlib.sha1(f"{image.size}".encode() + image.tobytes()).hexdigest()
+            result[path] = (digest, dhash(image))
+    return result
+
+
+def template_name(path: Path) -> str:
+    """Path as written in a "template" field, relative to its bundle's image dir"""
+    relative = path.relative_to(assets_dir)
+    return Path(*relative.parts[2:]).as_posix()
+
+
+def template_key(name: str) -> str:
+    """Written template name compared like the Windows file system: "./" prefixes, separators and case ignored"""
+    return posixpath.normpath(name.replace("\\", "/")).lower()
+
+
+def bundle_index(path: Path) -> int:
+    return BUNDLES.index(path.relative_to(assets_dir).parts[0])
+
+
+def template_references(bundles=BUNDLES) -> Dict[str, List[Path]]:
+    """Template name -> pipeline or interface files that reference it"""
+    references = {}
+
+    def add(names, source):
+        for name in names:
+            references.setdefault(name, [])
+            if source not in references[name]:
+                references[name].append(source)
+
+    for bundle in bundles:
+        nodes, sources = load_pipeline(assets_dir / bundle)
+        for name, node in nodes.items():
+            add(node_templates(node), sources[name])
+
+    for option in load_interface().get("option", {}).values():
+        for case in option.get("cases", []):
+            for body in case.get("pipeline_override", {}).values():
+                add(node_templates(body), assets_dir / "interface.json")
+    return references
+
+
+def referencing(references: Dict[str, List[Path]], path: Path) -> List[Path]:
+    """Files referencing an image, however the reference is written"""
+    key = template_key(template_name(path))
+    return sorted({source for written, sources in references.items() if template_key(written) == key for source in sources})
+
+
+def exact_duplicates(templates: Dict[Path, Tuple[str, int]], references: Dict[str, List[Path]]) -> List[List[Path]]:
+    """Groups of identical files, canonical first; localized paths excluded"""
+    names = {}
+    for path in templates:
+        names.setdefault(template_name(path), []).append(path)
+    localized = {name for name, paths in names.items() if len(paths) > 1}
+
+    groups = {}
+    for path, (digest, _) in templates.items():
+        if template_name(path) not in localized:
+            groups.setdefault(digest, []).append(path)
+
+    duplicates = []
+    for members in groups.values():
+        if len(members) > 1:
+            # Base bundle files first, since overlay bundles are not loaded by every profile
+            members.sort(key=lambda p: (bundle_index(p), -len(referencing(references, p)), template_name(p)))
+            duplicates.append(members)
+    return sorted(duplicates, key=lambda g: template_name(g[0]))
+
+
+def near_duplicates(templates: Dict[Path, Tuple[str, int]], distance: int) -> List[Tuple[Path, Path, int]]:
+    """Pairs of different images whose dHash differs in at most distance bits"""
+    paths = sorted(templates)
+    pairs = []
+    for i, a in enumerate(paths):
+        for b in paths[i + 1:]:
+            if templates[a][0] == templates[b][0]:
+                continue
+            bits = bin(templates[a][1] ^ templates[b][1]).count("1")
+            if bits <= distance:
+                pairs.append((a, b, bits))
+    return sorted(pairs, key=lambda p: (p[2], p[0]))
+
+
+def rewrite_references(duplicates: List[List[Path]], references: Dict[str, List[Path]]) -> List[Path]:
+    """Point every reference of a duplicate to its canonical file; returns the edited files"""
+    renames = {}
+    for members in duplicates:
+        for path in members[1:]:
+            renames[template_key(template_name(path))] = template_name(members[0])
+
+    # Each spelling of a reference ("./a.png", "a.png", ...) is replaced as written
+    edits = {}
+    for written, sources in references.items():
+        if template_key(written) in renames:
+            for source in sources:
+                edits.setdefault(source, []).append((written, renames[template_key(written)]))
+
+    for source, pairs in edits.items():
+        with open(source, "r", encoding="utf-8") as f:
+            text = f.read()
+        for old, new in pairs:
+            text = text.replace(json.dumps(old, ensure_ascii=False), json.dumps(new, ensure_ascii=False))
+        with open(source, "w", encoding="utf-8") as f:
+            f.write(text)
+    return sorted(edits)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find duplicated templates and merge exact copies.")
+    parser.add_argument("--distance", type=int, default=4,
+                        help="report templates whose dHash differs in at most this many bits")
+    parser.add_argument("--write", action="store_true",
+                        help="rewrite references to exact duplicates and delete the copies")
+    args = parser.parse_args()
+
+    templates = scan_templates()
+    references = template_references()
+    duplicates = exact_duplicates(templates, references)
+    near = near_duplicates(templates, args.distance)
+
+    redundant = [path for members in duplicates for path in members[1:]]
+    saved = sum(path.stat().st_size for path in redundant)
+    print(f"{len(templates)} templates, {len(duplicates)} exact duplicate groups, "
+          f"{len(redundant)} redundant files (~{saved / 1024:.1f} KB)")
+    for members in duplicates:
+        print(f"\n  {template_name(members[0])}")
+        for path in members[1:]:
+            print(f"    = {template_name(path)}  ({len(referencing(references, path))} referencing files)")
+
+    print(f"\n{len(near)} near-duplicate pairs within {args.distance} bits (review only):")
+    for a, b, bits in near:
+        print(f"  {bits}  {a.relative_to(root_dir).as_posix()}  ~  {b.relative_to(root_dir).as_posix()}")
+
+    if args.write:
+        edited = rewrite_references(duplicates, references)
+        for path in redundant:
+            path.unlink()
+        print(f"\nRewrote {len(edited)} files and deleted {len(redundant)} duplicate templates.")
+
+
+if __name__ == "__main__":
+    main()
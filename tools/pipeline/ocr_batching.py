@@ -0,0 +1,136 @@
+"""
+Find OCR candidates of one "next" list that read the same region.
+
+All candidates of a "next" list are recognized on the same screencap, and
+OCR nodes with the same roi, roi_offset, model, only_rec and threshold only
+differ in the "expected" text they look for. Each of them still runs its own
+OCR pass. Such groups can be switched to the agent's "shared_roi_ocr" custom
+recognition, which reads the roi once per frame and matches every
+candidate's "expected" against that single result.
+
+Nodes using "replace", "order_by" or "index", and nodes whose roi or expected
+text is set by an option override, are listed but not counted as batchable.
+
+Usage:
+    python tools/pipeline/ocr_batching.py [--resource 官服] [--min-size 2] [--json out.json]
+"""
+
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import argparse
+import json
+
+from pipeline_graph import PipelineGraph, load_interface, root_dir
+from compile_pipeline import task_overrides
+
+# Fields that change what the OCR pass returns, not only which result is picked
+READ_FIELDS = ("roi", "roi_offset", "model", "only_rec", "threshold")
+
+# Fields shared_roi_ocr does not implement
+UNSUPPORTED_FIELDS = ("replace", "order_by", "index")
+
+SHARED_RECOGNITION = "shared_roi_ocr"
+
+
+def read_key(graph: PipelineGraph, name: str) -> str:
+    """Everything that determines the raw OCR result of a node"""
+    return json.dumps({field: graph.value(name, field) for field in READ_FIELDS},
+                      ensure_ascii=False, sort_keys=True)
+
+
+def pinned_nodes(interface: dict) -> set:
+    """Nodes whose roi or expected text an option sets at task start"""
+    pinned = set()
+    for task in interface.get("task", []):
+        for override in task_overrides(interface, task):
+            pinned.update(name for name, body in override.items() if "roi" in body or "expected" in body)
+    return pinned
+
+
+def find_groups(graph: PipelineGraph, pinned: set, min_size: int) -> List[dict]:
+    """Groups of OCR candidates reading the same region, merged across the lists they appear in"""
+    groups: Dict[Tuple[str, ...], dict] = {}
+    for parent in graph.nodes:
+        by_key: Dict[str, List[str]] = {}
+        for target in graph.successors(parent, ("next",)):
+            node = graph.nodes.get(target)
+            if node and node.get("recognition") == "OCR" and isinstance(node.get("roi"), list):
+                members = by_key.setdefault(read_key(graph, target), [])
+                if target not in members:
+                    members.append(target)
+
+        for key, members in by_key.items():
+            if len(members) < min_size:
+                continue
+            group = groups.setdefault(tuple(sorted(members)), {
+                "nodes": sorted(members),
+                "read": json.loads(key),
+                "lists": [],
+            })
+            group["lists"].append(parent)
+
+    rows = []
+    for group in groups.values():
+        blocked = {}
+        for name in group["nodes"]:
+            reasons = [field for field in UNSUPPORTED_FIELDS if field in graph.nodes[name]]
+            if name in pinned:
+                reasons.append("option override")
+            if reasons:
+                blocked[name] = reasons
+        batchable = len(group["nodes"]) - len(blocked)
+        group["blocked"] = blocked
+        # Worst case per frame: every candidate is recognized before one hits
+        group["passes_saved"] = max(batchable - 1, 0)
+        rows.append(group)
+    return sorted(rows, key=lambda g: (-g["passes_saved"] * len(g["lists"]), g["nodes"]))
+
+
+def suggested_body(graph: PipelineGraph, name: str) -> dict:
+    """Recognition fields of a node rewritten to use the shared read"""
+    node = graph.nodes[name]
+    param = {"expected": node.get("expected", [])}
+    for field in ("model", "only_rec", "threshold"):
+        if field in node:
+            param[field] = node[field]
+    return {
+        "recognition": "Custom",
+        "custom_recognition": SHARED_RECOGNITION,
+        "custom_recognition_param": param,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Group OCR candidates that read the same region.")
+    parser.add_argument("--resource", help="resource profile name from interface.json (default: first)")
+    parser.add_argument("--min-size", type=int, default=2, help="smallest group of candidates to report")
+    parser.add_argument("--json", type=Path, help="also write the groups and suggested bodies as JSON")
+    args = parser.parse_args()
+
+    interface = load_interface()
+    graph = PipelineGraph.from_profile(args.resource, interface)
+    groups = find_groups(graph, pinned_nodes(interface), max(args.min_size, 2))
+
+    saved = sum(g["passes_saved"] for g in groups)
+    print(f"{len(groups)} groups of OCR candidates share a read, up to {saved} OCR passes per frame to save "
+          f"with {SHARED_RECOGNITION}:")
+    for g in groups:
+        source = graph.sources.get(g["nodes"][0])
+        relative = Path(source).resolve().relative_to(root_dir).as_posix() if source else "?"
+        print(f"\n  roi {g['read']['roi']}  ({relative}, in {len(g['lists'])} next lists, "
+              f"-{g['passes_saved']} passes)")
+        for name in g["nodes"]:
+            blocked = g["blocked"].get(name)
+            note = f"  [kept: {', '.join(blocked)}]" if blocked else ""
+            print(f"    {name}  expected {json.dumps(graph.nodes[name].get('expected'), ensure_ascii=False)}{note}")
+
+    if args.json:
+        for g in groups:
+            g["suggested"] = {name: suggested_body(graph, name) for name in g["nodes"] if name not in g["blocked"]}
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(groups, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
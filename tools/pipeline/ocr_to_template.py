@@ -0,0 +1,262 @@
+"""
+Propose TemplateMatch or ColorMatch replacements for OCR nodes on static UI text.
+
+Many OCR nodes look for a fixed label ("战斗", "结束", "常驻活动") whose
+rendering never changes, yet every check runs PaddleOCR detection and
+recognition. For each such node this tool takes run records that carry the
+frame they ran on (bench_recognition.py --records), crops a template at the
+recorded hit box, and replays both candidates against the recorded frames:
+
+* TemplateMatch: the crop is searched in the hit box padded by --padding,
+  with the same normalized correlation as the framework's default method.
+* ColorMatch: the median text color of the crop, +/- --tolerance, counted in
+  the hit box.
+
+A candidate is equivalent when it hits every frame the OCR node hit and
+misses every frame it missed, with a margin. ColorMatch is preferred when it
+is equivalent, since it costs almost nothing. Only nodes with a literal
+"expected", a fixed roi and no replace/order_by/index are considered, and
+nodes whose roi or expected text an option sets are left alone.
+
+Usage:
+    python tools/pipeline/ocr_to_template.py example_img run.jsonl [--node 跑步机] [--min-frames 3]
+                                              [--json out.json] [--write]
+"""
+
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+import argparse
+import json
+import re
+
+import numpy
+from PIL import Image
+
+from pipeline_graph import PipelineGraph, load_interface
+from compile_pipeline import assets_dir
+from ocr_batching import UNSUPPORTED_FIELDS, pinned_nodes
+from run_log import FRAME_SIZE, load_frames, read_records
+
+TEMPLATE_DIR = "ocr_template"
+
+# Hit boxes of a static label may only jitter by a few pixels between frames
+BOX_JITTER = 4
+
+
+class Replacement(NamedTuple):
+    node: str
+    positives: int
+    negatives: int
+    body: dict
+    # Worst score or pixel count on frames that must hit, and best on frames that must miss
+    worst_hit: float
+    best_miss: float
+    template: Optional[numpy.ndarray] = None
+
+
+def is_literal(expected) -> bool:
+    """True for expected text without regex syntax"""
+    values = [expected] if isinstance(expected, str) else expected or []
+    return bool(values) and all(value and re.escape(value) == value for value in values)
+
+
+def padded_box(box: List[int], padding: int) -> List[int]:
+    left = max(box[0] - padding, 0)
+    top = max(box[1] - padding, 0)
+    right = min(box[0] + box[2] + padding, FRAME_SIZE[0])
+    bottom = min(box[1] + box[3] + padding, FRAME_SIZE[1])
+    return [left, top, right - left, bottom - top]
+
+
+def crop(frame: numpy.ndarray, roi: List[int]) -> numpy.ndarray:
+    return frame[roi[1]:roi[1] + roi[3], roi[0]:roi[0] + roi[2]]
+
+
+def window_sums(values: numpy.ndarray, h: int, w: int) -> numpy.ndarray:
+    """Sum of every h x w window, through a summed-area table"""
+    table = numpy.zeros((values.shape[0] + 1, values.shape[1] + 1))
+    table[1:, 1:] = values.cumsum(0).cumsum(1)
+    return table[h:, w:] - table[:-h, w:] - table[h:, :-w] + table[:-h, :-w]
+
+
+def match_template(image: numpy.ndarray, template: numpy.ndarray) -> float:
+    """Best normalized correlation coefficient of template in image, over all channels like TM_CCOEFF_NORMED"""
+    H, W = image.shape[:2]
+    h, w = template.shape[:2]
+    if h > H or w > W:
+        return 0.0
+
+    image = image.astype(numpy.float64)
+    template = template.astype(numpy.float64)
+    template = template - template.mean(axis=(0, 1))
+    n = h * w
+
+    numerator = numpy.zeros((H - h + 1, W - w + 1))
+    variance = numpy.zeros_like(numerator)
+    for c in range(image.shape[2]):
+        spectrum = numpy.fft.rfft2(image[:, :, c]) * numpy.conj(numpy.fft.rfft2(template[:, :, c], (H, W)))
+        numerator += numpy.fft.irfft2(spectrum, (H, W))[:H - h + 1, :W - w + 1]
+        sums = window_sums(image[:, :, c], h, w)
+        variance += window_sums(image[:, :, c] ** 2, h, w) - sums ** 2 / n
+
+    denominator = numpy.sqrt(numpy.maximum(variance, 0) * (template ** 2).sum())
+    scores = numpy.where(denominator > 1e-6, numerator / numpy.maximum(denominator, 1e-6), 0.0)
+    return float(scores.max())
+
+
+def text_color(template: numpy.ndarray) -> Optional[numpy.ndarray]:
+    """Median color of the pixels that stand out from the crop's border, in BGR"""
+    border = numpy.concatenate([template[0], template[-1], template[:, 0], template[:, -1]])
+    background = numpy.median(border, axis=0)
+    distance = numpy.abs(template.astype(numpy.int32) - background).sum(axis=2)
+    text = template[distance > 60]
+    if len(text) < 10:
+        return None
+    return numpy.median(text, axis=0)
+
+
+def color_count(frame: numpy.ndarray, roi: List[int], lower: numpy.ndarray, upper: numpy.ndarray) -> int:
+    region = crop(frame, roi)
+    return int(numpy.all((region >= lower) & (region <= upper), axis=2).sum())
+
+
+def observations(paths: List[Path], nodes: set) -> Dict[str, Dict[str, list]]:
+    """Node -> frame -> hit box (None on a miss), last record per frame wins"""
+    result = {}
+    for record in read_records(paths):
+        if record.node in nodes and record.frame:
+            result.setdefault(record.node, {})[record.frame] = record.box if record.hit else None
+    return result
+
+
+def try_color_match(name: str, template, roi, hits, misses, frames, tolerance) -> Optional[Replacement]:
+    color = text_color(template)
+    if color is None:
+        return None
+    lower = numpy.clip(color - tolerance, 0, 255)
+    upper = numpy.clip(color + tolerance, 0, 255)
+
+    worst_hit = min(color_count(frames[f], roi, lower, upper) for f in hits)
+    best_miss = max(color_count(frames[f], roi, lower, upper) for f in misses)
+    count = int(worst_hit * 0.8)
+    # Frames that must miss stay under half of the required count
+    if count <= 0 or best_miss * 2 > count:
+        return None
+
+    body = {
+        "recognition": "ColorMatch",
+        "roi": roi,
+        # The framework compares RGB for the default method
+        "lower": [int(v) for v in lower[::-1]],
+        "upper": [int(v) for v in upper[::-1]],
+        "count": count,
+    }
+    return Replacement(name, len(hits), len(misses), body, worst_hit, best_miss)
+
+
+def try_template_match(name: str, template, roi, hits, misses, frames, threshold, margin) -> Optional[Replacement]:
+    worst_hit = min(match_template(crop(frames[f], roi), template) for f in hits)
+    best_miss = max(match_template(crop(frames[f], roi), template) for f in misses)
+    if worst_hit < threshold + margin or best_miss > threshold - margin:
+        return None
+
+    body = {
+        "recognition": "TemplateMatch",
+        "roi": roi,
+        "template": f"{TEMPLATE_DIR}/{name}.png",
+    }
+    return Replacement(name, len(hits), len(misses), body, round(worst_hit, 3), round(best_miss, 3), template)
+
+
+def propose(graph: PipelineGraph, seen: Dict[str, Dict[str, list]], frames: Dict[str, numpy.ndarray],
+            min_frames: int, padding: int, margin: float, tolerance: int) -> List[Replacement]:
+    threshold = graph.defaults.get("threshold", 0.7)
+    proposals = []
+    for name, results in sorted(seen.items()):
+        hits = {f: box for f, box in results.items() if box and f in frames}
+        misses = [f for f, box in results.items() if box is None and f in frames]
+        if len(hits) < min_frames or len(misses) < min_frames:
+            continue
+
+        boxes = list(hits.values())
+        if any(abs(b[2] - boxes[0][2]) > BOX_JITTER or abs(b[3] - boxes[0][3]) > BOX_JITTER for b in boxes):
+            # The text is rendered at different sizes, so a single crop cannot stand in for it
+            continue
+
+        first = next(iter(hits))
+        template = crop(frames[first], hits[first])
+        union = [
+            min(b[0] for b in boxes), min(b[1] for b in boxes),
+            max(b[0] + b[2] for b in boxes), max(b[1] + b[3] for b in boxes),
+        ]
+        union = [union[0], union[1], union[2] - union[0], union[3] - union[1]]
+
+        proposal = try_color_match(name, template, union, hits, misses, frames, tolerance)
+        if proposal is None:
+            roi = padded_box(union, padding)
+            proposal = try_template_match(name, template, roi, hits, misses, frames, threshold, margin)
+        if proposal:
+            proposals.append(proposal)
+    return proposals
+
+
+def candidate_nodes(graph: PipelineGraph, pinned: set, pattern: str) -> set:
+    regex = re.compile(pattern) if pattern else None
+    return {
+        name for name, node in graph.nodes.items()
+        if node.get("recognition") == "OCR"
+        and isinstance(node.get("roi"), list)
+        and is_literal(node.get("expected"))
+        and not any(field in node for field in UNSUPPORTED_FIELDS)
+        and name not in pinned
+        and (regex is None or regex.search(name))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Propose TemplateMatch/ColorMatch replacements for static OCR nodes.")
+    parser.add_argument("frames", type=Path, help="directory of the recorded 16:9 frames")
+    parser.add_argument("records", nargs="+", type=Path, help="run records (*.jsonl) with a frame per recognition")
+    parser.add_argument("--resource", help="resource profile name from interface.json (default: first)")
+    parser.add_argument("--node", help="only consider nodes whose name matches this regex")
+    parser.add_argument("--min-frames", type=int, default=3,
+                        help="hit and missed frames a node needs before a replacement is verified")
+    parser.add_argument("--padding", type=int, default=10, help="margin around the hit boxes for TemplateMatch (px)")
+    parser.add_argument("--margin", type=float, default=0.1,
+                        help="score distance from the threshold required on every frame")
+    parser.add_argument("--tolerance", type=int, default=24, help="per-channel range around the text color")
+    parser.add_argument("--json", type=Path, help="also write the replacement bodies as JSON")
+    parser.add_argument("--write", action="store_true", help=f"save the templates under image/{TEMPLATE_DIR}")
+    args = parser.parse_args()
+
+    interface = load_interface()
+    graph = PipelineGraph.from_profile(args.resource, interface)
+    nodes = candidate_nodes(graph, pinned_nodes(interface), args.node)
+    seen = observations(args.records, nodes)
+    frames = load_frames(args.frames)
+    proposals = propose(graph, seen, frames, args.min_frames, args.padding, args.margin, args.tolerance)
+
+    print(f"{len(nodes)} OCR nodes on literal text, {len(seen)} recorded with frames, "
+          f"{len(proposals)} equivalent replacements:")
+    for p in proposals:
+        print(f"\n  {p.node}  ({p.positives} hit / {p.negatives} missed frames, "
+              f"worst hit {p.worst_hit}, best miss {p.best_miss})")
+        print(f"    expected {json.dumps(graph.nodes[p.node].get('expected'), ensure_ascii=False)}")
+        print(f"    -> {json.dumps(p.body, ensure_ascii=False)}")
+
+    if args.write:
+        image_dir = assets_dir / "resource" / "image" / TEMPLATE_DIR
+        image_dir.mkdir(parents=True, exist_ok=True)
+        for p in proposals:
+            if p.template is not None:
+                Image.fromarray(numpy.ascontiguousarray(p.template[:, :, ::-1])).save(image_dir / f"{p.node}.png")
+        print(f"\nTemplates saved to {image_dir}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({p.node: p.body for p in proposals}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""
+Static index of the pipeline node graph.
+
+Resolves "next", "interrupt" and "on_error" edges across every pipeline file
+of a resource profile, then reports dangling references, nodes no task can
+reach, and self-loops that re-run without a meaningful delay.
+
+Usage:
+    python tools/pipeline/pipeline_graph.py [--resource 官服] [--min-delay 300] [--json out.json]
+"""
+
+from pathlib import Path
+from typing import Dict, Iterable, List, Set, Tuple
+
+import argparse
+import json
+import sys
+
+# Load compile_pipeline.py from the project root
+root_dir = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(root_dir))
+from compile_pipeline import (EDGE_FIELDS, apply_overrides, assets_dir, edge_targets, find_profile,
+                              load_jsonc, load_profile, reachable, resolve_profile_dirs, task_overrides)
+
+# MaaFramework built-in defaults, used when default_pipeline.json leaves a field unset
+FRAMEWORK_DEFAULTS = {
+    "pre_delay": 200,
+    "post_delay": 200,
+    "rate_limit": 1000,
+    "timeout": 20000,
+}
+
+# Fields that make a node wait for the screen instead of a fixed delay
+WAIT_FIELDS = ("pre_wait_freezes", "post_wait_freezes")
+
+
+def node_templates(node: dict) -> List[str]:
+    """
+    Template images a node or pipeline_override body loads: its own "template"
+    and the "template" of its custom_recognition_param, as multi_template_match reads it.
+    """
+    names = []
+    param = node.get("custom_recognition_param")
+    if isinstance(param, str):
+        try:
+            param = json.loads(param)
+        except json.JSONDecodeError:
+            param = None
+    for value in (node.get("template"), param.get("template") if isinstance(param, dict) else None):
+        names += [value] if isinstance(value, str) else list(value or [])
+    return names
+
+
+def load_interface(path: Path = None) -> dict:
+    with open(path or assets_dir / "interface.json", "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_defaults(profile: dict, project_dir: Path) -> dict:
+    """Effective "Default" node of a profile, later bundles overriding earlier ones"""
+    defaults = dict(FRAMEWORK_DEFAULTS)
+    for d in resolve_profile_dirs(profile, project_dir):
+        path = d / "default_pipeline.json"
+        if path.exists():
+            defaults.update(load_jsonc(path).get("Default", {}))
+    return defaults
+
+
+def selected_overrides(interface: dict, task: dict, choices: Dict[str, str] = None) -> List[Dict[str, dict]]:
+    """
+    pipeline_override list a task applies at runtime, in option order.
+    choices maps option name -> case name; unlisted options use their first case.
+    Raises ValueError if a chosen case does not exist.
+    """
+    choices = choices or {}
+    overrides = []
+    for name in task.get("option", []):
+        cases = interface.get("option", {}).get(name, {}).get("cases", [])
+        chosen = cases[:1]
+        if name in choices:
+            chosen = [c for c in cases if c.get("name") == choices[name]]
+            if not chosen:
+                valid = ", ".join(c.get("name", "") for c in cases)
+                raise ValueError(f"Option \"{name}\" has no case \"{choices[name]}\", valid cases: {valid}")
+        for case in chosen:
+            overrides.append(case.get("pipeline_override", {}))
+    for name in task.get("advanced", []):
+        overrides.append(interface.get("advanced", {}).get(name, {}).get("pipeline_override", {}))
+    return overrides
+
+
+def find_task(interface: dict, name: str) -> dict:
+    for task in interface.get("task", []):
+        if task.get("name") == name:
+            return task
+    raise ValueError(f"Task \"{name}\" not found in interface.json")
+
+
+class PipelineGraph:
+    """Node graph of one resource profile"""
+
+    def __init__(self, nodes: Dict[str, dict], sources: Dict[str, Path] = None, defaults: dict = None):
+        self.nodes = nodes
+        self.sources = sources or {}
+        self.defaults = defaults or dict(FRAMEWORK_DEFAULTS)
+
+    @classmethod
+    def from_profile(cls, resource: str = None, interface: dict = None, project_dir: Path = None):
+        interface = interface or load_interface()
+        project_dir = project_dir or assets_dir
+        profile = find_profile(interface, resource)
+        nodes, sources = load_profile(profile, project_dir)
+        return cls(nodes, sources, load_defaults(profile, project_dir))
+
+    def with_overrides(self, overrides: Iterable[Dict[str, dict]], union_edges: bool = True) -> "PipelineGraph":
+        """
+        Graph with pipeline overrides applied on top, in order.
+        With union_edges, edge lists of all overrides are unioned so alternative
+        cases stay reachable; otherwise each override replaces fields as at runtime.
+        """
+        nodes = apply_overrides(self.nodes, overrides, union_edges)
+        return PipelineGraph(nodes, self.sources, self.defaults)
+
+    def value(self, name: str, field: str):
+        """Field value of a node after default_pipeline.json and framework defaults"""
+        return self.nodes[name].get(field, self.defaults.get(field))
+
+    def edges(self, name: str, fields: Iterable[str] = EDGE_FIELDS) -> List[Tuple[str, str]]:
+        node = self.nodes.get(name, {})
+        return [(field, target) for field in fields for target in edge_targets(node, field)]
+
+    def successors(self, name: str, fields: Iterable[str] = EDGE_FIELDS) -> List[str]:
+        return [target for _, target in self.edges(name, fields)]
+
+    def reachable(self, entries: Iterable[str], fields: Iterable[str] = EDGE_FIELDS) -> Set[str]:
+        return reachable(self.nodes, entries, fields)
+
+    def dangling(self) -> List[Tuple[str, str, str]]:
+        """(node, field, missing target) for every unresolved edge"""
+        return [
+            (name, field, target)
+            for name in self.nodes
+            for field, target in self.edges(name)
+            if target not in self.nodes
+        ]
+
+    def fixed_delay(self, name: str) -> int:
+        """pre_delay + post_delay a node spends after it hits"""
+        return int(self.value(name, "pre_delay") or 0) + int(self.value(name, "post_delay") or 0)
+
+    def self_loops(self, min_delay: int = 300) -> List[Tuple[str, int]]:
+        """
+        Nodes that list themselves as a successor and re-run with less than
+        min_delay ms of fixed delay and no wait_freezes.
+        """
+        loops = []
+        for name, node in self.nodes.items():
+            if name not in self.successors(name):
+                continue
+            if any(node.get(field) for field in WAIT_FIELDS):
+                continue
+            delay = self.fixed_delay(name)
+            if delay < min_delay:
+                loops.append((name, delay))
+        return loops
+
+
+def task_reachability(graph: PipelineGraph, interface: dict) -> Dict[str, Set[str]]:
+    """Task name -> nodes reachable from its entry under any of its option cases"""
+    result = {}
+    for task in interface.get("task", []):
+        task_graph = graph.with_overrides(task_overrides(interface, task))
+        result[task["name"]] = task_graph.reachable([task["entry"]])
+    return result
+
+
+def build_report(graph: PipelineGraph, interface: dict, min_delay: int) -> dict:
+    reach = task_reachability(graph, interface)
+    reached = set().union(*reach.values()) if reach else set()
+
+    return {
+        "nodes": len(graph.nodes),
+        "dangling": [
+            {"node": n, "field": f, "target": t, "file": str(graph.sources.get(n, ""))}
+            for n, f, t in graph.dangling()
+        ],
+        "unreachable": sorted(set(graph.nodes) - reached),
+        "self_loops": [
+            {"node": n, "delay_ms": d, "file": str(graph.sources.get(n, ""))}
+            for n, d in graph.self_loops(min_delay)
+        ],
+        "missing_entries": [t["name"] for t in interface.get("task", []) if t["entry"] not in graph.nodes],
+        "tasks": {name: sorted(nodes) for name, nodes in reach.items()},
+    }
+
+
+def print_report(report: dict, graph: PipelineGraph):
+    def relative(path):
+        try:
+            return Path(path).relative_to(root_dir)
+        except ValueError:
+            return path
+
+    print(f"Nodes: {report['nodes']}")
+
+    print(f"\nDangling references: {len(report['dangling'])}")
+    for item in report["dangling"]:
+        print(f"  {item['node']} --{item['field']}--> {item['target']}  ({relative(item['file'])})")
+
+    print(f"\nTask entries not found: {len(report['missing_entries'])}")
+    for name in report["missing_entries"]:
+        print(f"  {name}")
+
+    print(f"\nSelf-loops without delay: {len(report['self_loops'])}")
+    for item in report["self_loops"]:
+        print(f"  {item['node']}  ({item['delay_ms']} ms, {relative(item['file'])})")
+
+    print(f"\nUnreachable nodes: {len(report['unreachable'])}")
+    for name in report["unreachable"]:
+        print(f"  {name}  ({relative(graph.sources.get(name, ''))})")
+
+    print("\nReachable nodes per task:")
+    for name, nodes in report["tasks"].items():
+        print(f"  {name}: {len(nodes)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index the pipeline node graph.")
+    parser.add_argument("--resource", help="resource profile name from interface.json (default: first)")
+    parser.add_argument("--min-delay", type=int, default=300,
+                        help="self-loops with less fixed delay than this (ms) are reported")
+    parser.add_argument("--json", type=Path, help="also write the full report as JSON")
+    args = parser.parse_args()
+
+    interface = load_interface()
+    graph = PipelineGraph.from_profile(args.resource, interface)
+    report = build_report(graph, interface, args.min_delay)
+
+    print_report(report, graph)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if report["dangling"] or report["missing_entries"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Propose "next" orders from recorded hits.
+
+MaaFramework tries the candidates of a "next" list in order on every
+screencap, so a rarely-hit candidate listed first costs one recognition per
+frame. From recorded runs, every hit of node X right after a hit of node P
+with X in P's next list counts as one P -> X transition; candidates are then
+sorted by transition count, keeping the original order among ties and for
+candidates never seen. Candidates that always match (DirectHit or inverse)
+stay in place.
+
+Reordering changes priority when two candidates can match the same frame,
+so review each proposal before applying it. With --overlay the proposals are
+written as a pipeline layer of {"node": {"next": [...]}} overrides, to be
+loaded after the main bundle, leaving the source files untouched.
+
+Usage:
+    python tools/pipeline/reorder_next.py debug/maa.log run.jsonl [--min-hits 20] [--overlay out_dir]
+"""
+
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import argparse
+import json
+
+from pipeline_graph import PipelineGraph, load_interface
+from compile_pipeline import edge_targets, task_overrides
+from run_log import read_records
+
+
+def count_transitions(graph: PipelineGraph, paths: List[Path]) -> Dict[str, Dict[str, int]]:
+    """node -> {successor: times it was the next hit}"""
+    counts = {}
+    previous = None
+    for record in read_records(paths):
+        if not record.hit or record.node not in graph.nodes:
+            continue
+        if previous is not None and record.node in edge_targets(graph.nodes[previous], "next"):
+            successors = counts.setdefault(previous, {})
+            successors[record.node] = successors.get(record.node, 0) + 1
+        previous = record.node
+    return counts
+
+
+def expected_attempts(order: List[str], counts: Dict[str, int]) -> float:
+    """Mean recognitions until the hit candidate, when every candidate before it misses once"""
+    total = sum(counts.values())
+    if not total:
+        return 0.0
+    return sum(counts.get(name, 0) * (i + 1) for i, name in enumerate(order)) / total
+
+
+def is_fallback(graph: PipelineGraph, name: str) -> bool:
+    """Candidates that match whenever they are tried, so everything after them is shadowed"""
+    node = graph.nodes.get(name, {})
+    return node.get("recognition", "DirectHit") == "DirectHit" or bool(node.get("inverse"))
+
+
+def reorder(graph: PipelineGraph, current: List[str], successors: Dict[str, int]) -> List[str]:
+    """Sort candidates by hits; fallback candidates keep their slot so they never shadow others"""
+    movable = [t for t in current if not is_fallback(graph, t)]
+    ranked = iter(sorted(movable, key=lambda t: (-successors.get(t, 0), current.index(t))))
+    return [t if is_fallback(graph, t) else next(ranked) for t in current]
+
+
+def propose(graph: PipelineGraph, counts: Dict[str, Dict[str, int]], min_hits: int,
+            pinned: set) -> List[Tuple[str, List[str], List[str], float, float]]:
+    proposals = []
+    for name, successors in counts.items():
+        if sum(successors.values()) < min_hits or name in pinned:
+            continue
+        current = edge_targets(graph.nodes[name], "next")
+        proposed = reorder(graph, current, successors)
+        if proposed == current:
+            continue
+        proposals.append((
+            name, current, proposed,
+            expected_attempts(current, successors), expected_attempts(proposed, successors),
+        ))
+
+    # Biggest savings first, weighted by how often the node runs
+    proposals.sort(key=lambda p: -(p[3] - p[4]) * sum(counts[p[0]].values()))
+    return proposals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Propose next-list orders from recorded hits.")
+    parser.add_argument("logs", nargs="+", type=Path, help="maa.log files or *.jsonl run records")
+    parser.add_argument("--resource", help="resource profile name from interface.json (default: first)")
+    parser.add_argument("--min-hits", type=int, default=20, help="ignore nodes with fewer recorded transitions")
+    parser.add_argument("--overlay", type=Path, help="write proposals as an override layer into this bundle dir")
+    args = parser.parse_args()
+
+    interface = load_interface()
+    graph = PipelineGraph.from_profile(args.resource, interface)
+
+    # Options override these nodes at task start, which would mask an overlay
+    pinned = set()
+    for task in interface.get("task", []):
+        for override in task_overrides(interface, task):
+            pinned.update(name for name, body in override.items() if "next" in body)
+
+    counts = count_transitions(graph, args.logs)
+    proposals = propose(graph, counts, args.min_hits, pinned)
+
+    print(f"{len(counts)} nodes with recorded transitions, {len(proposals)} reorders proposed")
+    for name, current, proposed, before, after in proposals:
+        print(f"\n  {name}  ({sum(counts[name].values())} hits, "
+              f"{before:.2f} -> {after:.2f} recognitions per step)")
+        for target in proposed:
+            print(f"    {counts[name].get(target, 0):>6}  {target}  (was #{current.index(target) + 1})")
+
+    if args.overlay:
+        path = args.overlay / "pipeline" / "next_order.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({name: {"next": proposed} for name, _, proposed, _, _ in proposals},
+                      f, ensure_ascii=False, indent=4)
+        print(f"\nOverlay written to {path}")
+
+
+if __name__ == "__main__":
+    main()
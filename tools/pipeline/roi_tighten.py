@@ -0,0 +1,182 @@
+"""
+Suggest tighter ROIs for OCR and TemplateMatch nodes from recorded hit boxes.
+
+Recognition cost grows with ROI area, and many nodes search far more of the
+screen than their target ever occupies. For every node with enough recorded
+hits, the union of its hit boxes is padded, clipped to the current ROI and
+proposed as the new ROI when it saves enough area. Nodes whose ROI is a node
+reference, shifted by roi_offset, or replaced by an option override are left
+alone.
+
+The proposals are printed as a unified diff against the pipeline files, ready
+for review and `git apply`. A node that is hit in different places in
+situations the recordings do not cover will miss after tightening, so record
+every variant of a screen before applying.
+
+Usage:
+    python tools/pipeline/roi_tighten.py debug/maa.log run.jsonl [--padding 20] [--min-hits 10]
+                                          [--min-saving 0.3] [--diff roi.patch]
+"""
+
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+import argparse
+import difflib
+import re
+
+from pipeline_graph import PipelineGraph, load_interface, root_dir
+from compile_pipeline import assets_dir, find_profile, load_pipeline, resolve_profile_dirs, task_overrides
+from run_log import read_records
+
+# Recognitions whose cost scales with the searched area
+TIGHTENED_RECOGNITIONS = ("OCR", "TemplateMatch")
+
+
+class Suggestion(NamedTuple):
+    node: str
+    hits: int
+    current: List[int]
+    proposed: List[int]
+    source: Path
+
+
+def area(roi: List[int]) -> int:
+    return max(roi[2], 0) * max(roi[3], 0)
+
+
+def padded_union(boxes: List[List[int]], padding: int, bounds: List[int]) -> List[int]:
+    """Smallest rectangle holding every box, grown by padding and clipped to bounds"""
+    left = min(b[0] for b in boxes) - padding
+    top = min(b[1] for b in boxes) - padding
+    right = max(b[0] + b[2] for b in boxes) + padding
+    bottom = max(b[1] + b[3] for b in boxes) + padding
+
+    left = max(left, bounds[0])
+    top = max(top, bounds[1])
+    right = min(right, bounds[0] + bounds[2])
+    bottom = min(bottom, bounds[1] + bounds[3])
+    return [left, top, right - left, bottom - top]
+
+
+def collect_boxes(graph: PipelineGraph, paths: List[Path]) -> Dict[str, List[List[int]]]:
+    boxes = {}
+    for record in read_records(paths):
+        if record.hit and record.box and record.node in graph.nodes:
+            boxes.setdefault(record.node, []).append(record.box)
+    return boxes
+
+
+def roi_sources(profile: dict, project_dir: Path) -> Dict[str, Path]:
+    """Node name -> file of the last bundle that sets its roi"""
+    sources = {}
+    for d in resolve_profile_dirs(profile, project_dir):
+        nodes, layer_sources = load_pipeline(d)
+        for name, node in nodes.items():
+            if "roi" in node:
+                sources[name] = layer_sources[name]
+    return sources
+
+
+def suggest(graph: PipelineGraph, boxes: Dict[str, List[List[int]]], sources: Dict[str, Path],
+            pinned: set, padding: int, min_hits: int, min_saving: float) -> List[Suggestion]:
+    suggestions = []
+    for name, hits in boxes.items():
+        node = graph.nodes[name]
+        roi = node.get("roi")
+        if len(hits) < min_hits or name in pinned or name not in sources:
+            continue
+        if node.get("recognition") not in TIGHTENED_RECOGNITIONS or "roi_offset" in node:
+            continue
+        if not isinstance(roi, list) or len(roi) != 4:
+            continue
+
+        proposed = padded_union(hits, padding, roi)
+        if area(proposed) <= 0 or area(proposed) > area(roi) * (1 - min_saving):
+            continue
+        suggestions.append(Suggestion(name, len(hits), roi, proposed, sources[name]))
+
+    return sorted(suggestions, key=lambda s: -(area(s.current) - area(s.proposed)) * s.hits)
+
+
+_HEADER = re.compile(r'^(\s*)"((?:[^"\\]|\\.)+)"\s*:\s*\{')
+_ROI = re.compile(r'("roi"\s*:\s*)\[[^\]]*\]')
+
+
+def rewrite_roi(lines: List[str], name: str, roi: List[int]) -> Optional[List[str]]:
+    """Copy of a pipeline file's lines with the roi of one node replaced, keeping formatting"""
+    start = indent = None
+    for i, line in enumerate(lines):
+        match = _HEADER.match(line)
+        if start is None:
+            if match and match.group(2) == name:
+                start, indent = i, match.group(1)
+            continue
+        if match and match.group(1) == indent:
+            break
+        if _ROI.search(line):
+            lines = list(lines)
+            lines[i] = _ROI.sub(lambda m: m.group(1) + "[" + ", ".join(map(str, roi)) + "]", line, count=1)
+            return lines
+    return None
+
+
+def build_diff(suggestions: List[Suggestion]) -> str:
+    by_file = {}
+    for s in suggestions:
+        by_file.setdefault(s.source, []).append(s)
+
+    chunks = []
+    for path in sorted(by_file):
+        with open(path, "r", encoding="utf-8") as f:
+            original = f.read().splitlines(keepends=True)
+        lines = original
+        for s in by_file[path]:
+            lines = rewrite_roi(lines, s.node, s.proposed) or lines
+
+        relative = Path(path).resolve().relative_to(root_dir).as_posix()
+        chunks.extend(difflib.unified_diff(original, lines, f"a/{relative}", f"b/{relative}"))
+    return "".join(chunks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suggest tighter ROIs from recorded hit boxes.")
+    parser.add_argument("logs", nargs="+", type=Path, help="maa.log files or *.jsonl run records")
+    parser.add_argument("--resource", help="resource profile name from interface.json (default: first)")
+    parser.add_argument("--padding", type=int, default=20, help="margin kept around the observed boxes (px)")
+    parser.add_argument("--min-hits", type=int, default=10, help="ignore nodes with fewer recorded hits")
+    parser.add_argument("--min-saving", type=float, default=0.3,
+                        help="only suggest ROIs at least this fraction smaller")
+    parser.add_argument("--diff", type=Path, help="write the diff here instead of printing it")
+    args = parser.parse_args()
+
+    interface = load_interface()
+    graph = PipelineGraph.from_profile(args.resource, interface)
+    sources = roi_sources(find_profile(interface, args.resource), assets_dir)
+
+    # Options set these rois at task start, which would mask an edit of the file
+    pinned = set()
+    for task in interface.get("task", []):
+        for override in task_overrides(interface, task):
+            pinned.update(name for name, body in override.items() if "roi" in body)
+
+    boxes = collect_boxes(graph, args.logs)
+    suggestions = suggest(graph, boxes, sources, pinned, args.padding, args.min_hits, args.min_saving)
+
+    print(f"{len(boxes)} nodes with recorded hits, {len(suggestions)} ROIs to tighten")
+    for s in suggestions:
+        saving = 1 - area(s.proposed) / area(s.current)
+        print(f"  {s.node}  ({s.hits} hits)  {s.current} -> {s.proposed}  (-{saving:.0%} area)")
+
+    diff = build_diff(suggestions)
+    if args.diff:
+        with open(args.diff, "w", encoding="utf-8", newline="\n") as f:
+            f.write(diff)
+        print(f"\nDiff written to {args.diff}")
+    elif diff:
+        print()
+        print(diff, end="")
+
+
+if __name__ == "__main__":
+    main()
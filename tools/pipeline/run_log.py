@@ -0,0 +1,132 @@
+"""
+Readers for recorded recognition results.
+
+Two inputs are understood:
+
+* Run records (*.jsonl), one recognition per line, as written by bench_recognition.py:
+      {"node": "134战斗_开始作战", "hit": true, "box": [1093, 604, 95, 38], "cost_ms": 12.5,
+       "frame": "13-4/origin.png"}
+  "box" is null on a miss; "cost_ms" and "frame" (the recorded frame the
+  recognition ran on) are optional.
+
+* MaaFramework logs (maa.log). Lines carrying a node name and a recognition box,
+  either as [name=...] [box=...] fields or as JSON "name"/"box" members, are
+  picked up; anything else is skipped.
+"""
+
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+import json
+import re
+
+
+class RecognitionRecord(NamedTuple):
+    node: str
+    hit: bool
+    box: Optional[List[int]] = None
+    cost_ms: Optional[float] = None
+    frame: Optional[str] = None
+
+
+# Recorded frames are scaled to the resolution every resource is authored against
+FRAME_SIZE = (1280, 720)
+FRAME_SUFFIXES = (".png", ".jpg", ".jpeg", ".bmp")
+
+
+_NAME_PATTERNS = [
+    re.compile(r'"name"\s*:\s*"((?:[^"\\]|\\.)+)"'),
+    re.compile(r"\[(?:node_)?name=([^\]]+)\]"),
+]
+_BOX_PATTERNS = [
+    re.compile(r'"box"\s*:\s*(null|\[\s*-?\d+\s*,\s*-?\d+\s*,\s*-?\d+\s*,\s*-?\d+\s*\])'),
+    re.compile(r"\[box=(null|\[\s*-?\d+\s*,\s*-?\d+\s*,\s*-?\d+\s*,\s*-?\d+\s*\])\]"),
+]
+_HIT_PATTERN = re.compile(r'(?:"hit"\s*:\s*|\[hit=)(true|false)')
+
+
+def _search(patterns, line: str) -> Optional[str]:
+    for pattern in patterns:
+        match = pattern.search(line)
+        if match:
+            return match.group(1)
+    return None
+
+
+def parse_log_line(line: str) -> Optional[RecognitionRecord]:
+    name = _search(_NAME_PATTERNS, line)
+    box_text = _search(_BOX_PATTERNS, line)
+    hit_text = _HIT_PATTERN.search(line)
+    if name is None or (box_text is None and hit_text is None):
+        return None
+
+    box = json.loads(box_text) if box_text else None
+    if box is not None and not any(box):
+        box = None
+
+    if hit_text:
+        hit = hit_text.group(1) == "true"
+    else:
+        hit = box is not None
+
+    if "\\" in name:
+        try:
+            name = json.loads(f'"{name}"')
+        except json.JSONDecodeError:
+            pass
+
+    return RecognitionRecord(name, hit, box)
+
+
+def parse_record(data: dict) -> Optional[RecognitionRecord]:
+    node = data.get("node") or data.get("name")
+    if not node:
+        return None
+    box = data.get("box")
+    if box is not None and not any(box):
+        box = None
+    hit = data.get("hit", box is not None)
+    return RecognitionRecord(node, bool(hit), box, data.get("cost_ms"), data.get("frame"))
+
+
+def read_records(paths: Iterable[Path]) -> Iterator[RecognitionRecord]:
+    """Yield recognitions from run records and maa.log files in chronological order"""
+    for path in paths:
+        path = Path(path)
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            if path.suffix == ".jsonl":
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    record = parse_record(json.loads(line))
+                    if record:
+                        yield record
+            else:
+                for line in f:
+                    record = parse_log_line(line)
+                    if record:
+                        yield record
+
+
+def write_records(path: Path, records: Iterable[RecognitionRecord]):
+    with open(path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record._asdict(), ensure_ascii=False) + "\n")
+
+
+def load_frames(frames_dir: Path) -> Dict[str, "numpy.ndarray"]:
+    """Relative path -> BGR frame at 1280x720, as screencaps are handed to recognitions"""
+    # Only the tools that replay frames need numpy and Pillow
+    import numpy
+    from PIL import Image
+
+    frames = {}
+    for path in sorted(p for p in Path(frames_dir).rglob("*") if p.suffix.lower() in FRAME_SUFFIXES):
+        with Image.open(path) as image:
+            if abs(image.width * 9 - image.height * 16) > image.height // 10:
+                print(f"Skipping {path}: {image.width}x{image.height} is not 16:9")
+                continue
+            rgb = image.convert("RGB").resize(FRAME_SIZE, Image.Resampling.BILINEAR)
+        frames[path.relative_to(frames_dir).as_posix()] = numpy.ascontiguousarray(numpy.asarray(rgb)[:, :, ::-1])
+    return frames
@@ -0,0 +1,140 @@
+"""
+Rank TemplateMatch nodes by the cost of their search.
+
+For every TemplateMatch node, and every custom recognition that takes its
+templates in custom_recognition_param (multi_template_match), the referenced
+templates are loaded from the profile's image dirs and compared with the
+node's "roi". Nodes are flagged when a template is larger than the ROI (it
+can never match), when there is no ROI (the whole 1280x720 frame is
+searched), or when the ROI is many times larger than the template. The relative cost of a search is estimated
+as ROI area x template area, summed over the node's templates.
+
+Usage:
+    python tools/pipeline/template_cost.py [--resource 官服] [--ratio 50] [--top 30] [--json out.json]
+"""
+
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import argparse
+import json
+import sys
+
+from PIL import Image
+
+from pipeline_graph import PipelineGraph, load_interface, node_templates, root_dir
+from compile_pipeline import assets_dir, find_profile, resolve_profile_dirs
+
+# Every resource is authored against a 1280x720 screenshot
+SCREEN = [0, 0, 1280, 720]
+
+
+def find_template(name: str, image_dirs: List[Path]) -> Optional[Path]:
+    """Image file a template name resolves to, later bundles first; case-insensitive like Windows"""
+    for image_dir in reversed(image_dirs):
+        path = image_dir / name
+        if path.exists():
+            return path
+        matches = [p for p in image_dir.rglob("*") if p.relative_to(image_dir).as_posix().lower() == name.lower()]
+        if matches:
+            return matches[0]
+    return None
+
+
+def template_size(path: Path, cache: Dict[Path, Tuple[int, int]]) -> Optional[Tuple[int, int]]:
+    if path not in cache:
+        try:
+            with Image.open(path) as image:
+                cache[path] = image.size
+        except (OSError, SyntaxError):
+            cache[path] = None
+    return cache[path]
+
+
+def analyze(graph: PipelineGraph, image_dirs: List[Path], ratio: float) -> List[dict]:
+    sizes = {}
+    rows = []
+    for name, node in graph.nodes.items():
+        templates = node_templates(node)
+        if node.get("recognition") != "TemplateMatch" and not templates:
+            continue
+
+        roi = node.get("roi")
+        flags = []
+        if roi is None:
+            roi = SCREEN
+            flags.append("full frame")
+        elif isinstance(roi, str):
+            # Searched around another node's hit, the area is only known at runtime
+            roi = None
+            flags.append("dynamic roi")
+        elif len(roi) == 2:
+            roi = [roi[0], roi[1], SCREEN[2] - roi[0], SCREEN[3] - roi[1]]
+
+        cost = 0
+        sizes_of_node = []
+        for template in templates:
+            path = find_template(template, image_dirs)
+            size = template_size(path, sizes) if path else None
+            if size is None:
+                flags.append(f"missing template {template}")
+                continue
+            sizes_of_node.append(size)
+            if roi is None:
+                continue
+            if size[0] > roi[2] or size[1] > roi[3]:
+                flags.append(f"{template} {size[0]}x{size[1]} larger than roi")
+            elif roi[2] * roi[3] > ratio * size[0] * size[1]:
+                flags.append(f"roi {roi[2] * roi[3] / (size[0] * size[1]):.0f}x {template}")
+            cost += roi[2] * roi[3] * size[0] * size[1]
+
+        rows.append({
+            "node": name,
+            "file": str(graph.sources.get(name, "")),
+            "roi": roi,
+            "templates": templates,
+            "sizes": sizes_of_node,
+            "cost": cost,
+            "flags": flags,
+        })
+
+    return sorted(rows, key=lambda r: -r["cost"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rank TemplateMatch nodes by search cost.")
+    parser.add_argument("--resource", help="resource profile name from interface.json (default: first)")
+    parser.add_argument("--ratio", type=float, default=50,
+                        help="flag ROIs more than this many times larger than the template")
+    parser.add_argument("--top", type=int, default=30, help="nodes to list by cost")
+    parser.add_argument("--json", type=Path, help="also write the full report as JSON")
+    args = parser.parse_args()
+
+    interface = load_interface()
+    graph = PipelineGraph.from_profile(args.resource, interface)
+    image_dirs = [d / "image" for d in resolve_profile_dirs(find_profile(interface, args.resource), assets_dir)]
+    rows = analyze(graph, image_dirs, args.ratio)
+
+    total = sum(r["cost"] for r in rows) or 1
+    print(f"{len(rows)} template matching nodes, most expensive searches (cost = roi area x template area):")
+    for r in rows[:args.top]:
+        print(f"  {r['cost'] / total:6.1%}  {r['node']}  roi {r['roi']}  "
+              f"templates {', '.join(f'{w}x{h}' for w, h in r['sizes'])}")
+
+    flagged = [r for r in rows if r["flags"]]
+    print(f"\n{len(flagged)} nodes flagged:")
+    for r in flagged:
+        print(f"  {r['node']}  ({Path(r['file']).relative_to(root_dir).as_posix()})")
+        for flag in r["flags"]:
+            print(f"    {flag}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
+
+    if any("larger than roi" in flag or flag.startswith("missing") for r in rows for flag in r["flags"]):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()